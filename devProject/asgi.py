@@ -5,6 +5,15 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+To serve the async API views (testApp.async_views), set ASYNC_API_VIEWS=True
+and run, for example:
+
+    gunicorn devProject.asgi:application -k uvicorn.workers.UvicornWorker
+
+The live timeline stream (/events/timeline/, Server-Sent Events) is only
+served under ASGI. Its pub/sub is in-process, so run a single worker
+process for it (events from other workers are not delivered).
 """
 
 import os
@@ -1,12 +1,45 @@
 from django.contrib import admin
+
+from . import export
 from .models import Post
+from .streaming import streaming_response
+
+
+def _export_response(request, table, fmt, queryset):
+    """選択範囲を少しずつ読みながらダウンロードさせる（全件をメモリに載せない）。"""
+    content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    response = streaming_response(
+        request,
+        export.export(table, fmt, queryset=queryset),
+        content_type=f"{content_type}; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{export.filename(table, fmt)}"'
+    return response
+
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ("id", "author", "short_content", "created_at")
+    list_select_related = ("author",)
     list_filter = ("author", "created_at")
     search_fields = ("content", "author__username")
+    # どちらも F() で更新するカウンター。フォームの古い値で上書きさせない
+    readonly_fields = ("like_count", "version")
+    actions = ("export_csv", "export_ndjson", "export_likes_csv")
 
     @admin.display(description="Content")
     def short_content(self, obj):
-        return obj.content[:20] + ("..." if len(obj.content) > 20 else "")
\ No newline at end of file
+        return obj.content[:20] + ("..." if len(obj.content) > 20 else "")
+
+    @admin.action(description="選択した投稿を CSV でエクスポート")
+    def export_csv(self, request, queryset):
+        return _export_response(request, "posts", "csv", queryset)
+
+    @admin.action(description="選択した投稿を NDJSON でエクスポート")
+    def export_ndjson(self, request, queryset):
+        return _export_response(request, "posts", "ndjson", queryset)
+
+    @admin.action(description="選択した投稿のいいねを CSV でエクスポート")
+    def export_likes_csv(self, request, queryset):
+        likes = Post.likes.through.objects.filter(post__in=queryset.values("pk"))
+        return _export_response(request, "likes", "csv", likes)
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class TestappConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "testApp"
-    label = "testapp"
\ No newline at end of file
+    label = "testapp"
+
+    def ready(self):
+        from . import signals  # noqa: F401  シグナルハンドラの登録
@@ -0,0 +1,95 @@
+import asyncio
+import random
+import time
+import weakref
+
+import httpx
+from django.conf import settings
+
+from .http_client import RETRY_METHODS, RETRY_STATUSES, UpstreamUnavailable, get_upstream
+
+
+# ========= 外部 API 用の共有 HTTP クライアント（async 版） =========
+# 設定・認証ヘッダ・サーキットブレーカーは http_client の Upstream と共有する。
+# httpx.AsyncClient はイベントループに紐づくので、ループごと・上流ごとに 1 つ持つ。
+
+_clients = weakref.WeakKeyDictionary()  # loop -> {upstream name: AsyncClient}
+
+
+def _client(upstream):
+    loop = asyncio.get_running_loop()
+    per_loop = _clients.setdefault(loop, {})
+    client = per_loop.get(upstream.name)
+    if client is None:
+        config = settings.HTTP_UPSTREAMS[upstream.name]
+        max_connections = config.get("async_max_connections", 100)
+        client = per_loop[upstream.name] = httpx.AsyncClient(
+            timeout=upstream.timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=config.get("pool_maxsize", 10),
+            ),
+        )
+    return client
+
+
+async def request(upstream, method, path, retry=None, **kwargs):
+    upstream = get_upstream(upstream)
+    method = method.upper()
+    url = upstream.url(path)
+    headers = {**upstream.headers(url), **kwargs.pop("headers", {})}
+    if retry is None:
+        retry = method in RETRY_METHODS
+    attempts = 1 + (upstream.retries if retry else 0)
+    client = _client(upstream)
+
+    for attempt in range(attempts):
+        if not upstream.breaker.allow():
+            raise UpstreamUnavailable(f"{upstream.name}: circuit open")
+
+        last = attempt == attempts - 1
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, headers=headers, **kwargs)
+        except httpx.TransportError as e:
+            upstream.observe(
+                method, url, started, error=e, timeout=isinstance(e, httpx.TimeoutException)
+            )
+            upstream.breaker.record_failure()
+            if last:
+                raise
+        except httpx.HTTPError as e:
+            # リダイレクトの上限・壊れた応答など。リトライはしないが失敗として数える
+            upstream.observe(method, url, started, error=e)
+            upstream.breaker.record_failure()
+            raise
+        except BaseException:
+            # キャンセル（クライアントの切断）などで half-open の試行枠を握ったままにしない
+            upstream.breaker.release_trial()
+            raise
+        else:
+            upstream.observe(method, url, started, status=response.status_code)
+            if response.status_code >= 500:
+                upstream.breaker.record_failure()
+            else:
+                upstream.breaker.record_success()
+            if last or response.status_code not in RETRY_STATUSES:
+                return response
+            await response.aclose()
+
+        await asyncio.sleep(random.uniform(0, upstream.backoff * (2 ** attempt)))
+
+
+async def get(upstream, path, **kwargs):
+    return await request(upstream, "GET", path, **kwargs)
+
+
+async def post(upstream, path, **kwargs):
+    return await request(upstream, "POST", path, **kwargs)
+
+
+async def aclose():
+    """今のイベントループのクライアントを閉じる（終了時・テスト用）。"""
+    per_loop = _clients.pop(asyncio.get_running_loop(), {})
+    for client in per_loop.values():
+        await client.aclose()
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from . import async_http_client, http_client, live, todoist
+from .eventlog import log_event
+from .freesound import (
+    SEARCH_PATH,
+    FreesoundError,
+    normalize_tag,
+    parse_search_response,
+    search_params,
+    sound_search_cache,
+)
+from .models import TodoistSyncState
+from .views import (
+    _batch_ops,
+    _json_body,
+    _sound_choice_response,
+    _todoist_failed,
+    _todoist_tasks_response,
+)
+
+
+# ========= 外部 API ビューの async 版 =========
+# ASGI サーバー（uvicorn 等）で動かすと、上流の応答待ちでワーカーを占有しない。
+# settings.ASYNC_API_VIEWS = True で urls.py がこちらを使う。
+# レスポンスの形は同期版（views.py）と同じ。
+
+UPSTREAM_ERRORS = (httpx.HTTPError, http_client.UpstreamUnavailable)
+
+
+async def _search_sounds(tag):
+    r = await async_http_client.get("freesound", SEARCH_PATH, params=search_params(tag))
+    return parse_search_response(tag, r)
+
+
+# ========= タイムラインのライブ更新（SSE） =========
+async def _live_stream():
+    subscription = live.subscribe()
+    try:
+        yield "retry: 3000\n\n"  # 切れたら 3 秒後に再接続
+        while True:
+            message = await subscription.get(settings.LIVE_KEEPALIVE_SECONDS)
+            yield message if message is not None else ": keepalive\n\n"
+    finally:
+        # 切断されると Django がこのジェネレーターをキャンセルする
+        live.unsubscribe(subscription)
+
+
+@require_GET
+async def timeline_events(request):
+    """
+    新しい投稿（event: post）といいね数の変化（event: like）を Server-Sent Events で流す。
+
+    接続を保持するのでワーカースレッドを占有しない ASGI 専用。
+    WSGI では 204 を返す（EventSource は再接続をやめる）。
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(_live_stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx にバッファさせない
+    return response
+
+
+# ========= Freesound: 環境音 =========
+@require_GET
+async def api_sound(request):
+    tag = normalize_tag(request.GET.get("tag"))
+
+    if not http_client.has_token("freesound"):
+        return JsonResponse({"error": "FREESOUND_TOKEN is not set"}, status=500)
+
+    try:
+        results = await sound_search_cache.aget(tag, _search_sounds)
+    except FreesoundError as e:
+        return JsonResponse(e.payload, status=502)
+    except UPSTREAM_ERRORS as e:
+        log_event("api_sound_failed", level=logging.WARNING, tag=tag, error=repr(e))
+        return JsonResponse(
+            {"error": "Freesound request exception", "detail": str(e)},
+            status=502,
+        )
+    except Exception as e:
+        log_event("api_sound_failed", level=logging.ERROR, tag=tag, error=repr(e))
+        return JsonResponse(
+            {"error": "Freesound exception", "detail": str(e)},
+            status=502,
+        )
+
+    return _sound_choice_response(tag, results)
+
+
+# ========= Todoist: タスクリスト取得 =========
+@require_GET
+async def api_todoist_tasks(request):
+    if not http_client.has_token("todoist"):
+        return JsonResponse({"error": "TODOIST_TOKEN is not set"}, status=500)
+
+    stale = False
+    try:
+        state = await sync_to_async(TodoistSyncState.load)()
+        if request.GET.get("refresh") == "1" or todoist.is_stale(state):
+            r = await async_http_client.post(
+                "todoist", todoist.SYNC_PATH, data=todoist.sync_request_data(state), retry=True
+            )
+            r.raise_for_status()
+            await sync_to_async(todoist.apply_sync)(r.json())
+    except httpx.HTTPStatusError as e:
+        if not await sync_to_async(todoist.has_synced)():
+            return _todoist_failed("sync", e.response)
+        stale = True
+    except Exception as e:
+        if not await sync_to_async(todoist.has_synced)():
+            return JsonResponse({"error": "Todoist exception", "detail": str(e)}, status=502)
+        stale = True
+
+    return await sync_to_async(_todoist_tasks_response)(request, stale)
+
+
+# ========= Todoist: タスク作成 =========
+@csrf_exempt
+@require_POST
+async def api_todoist_create_task(request):
+    if not http_client.has_token("todoist"):
+        return JsonResponse({"error": "TODOIST_TOKEN is not set"}, status=500)
+
+    body = _json_body(request)
+    if body is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    content = str(body.get("content") or "").strip()
+
+    if not content:
+        return JsonResponse({"error": "content is required"}, status=400)
+
+    try:
+        r = await async_http_client.post("todoist", "rest/v2/tasks", json={"content": content})
+        if r.status_code not in (200, 201):
+            return _todoist_failed("create", r)
+
+        task = r.json()
+        await sync_to_async(todoist.record_created)(task)
+        return JsonResponse({"id": task.get("id"), "content": task.get("content")})
+    except Exception as e:
+        return JsonResponse({"error": "Todoist exception", "detail": str(e)}, status=502)
+
+
+# ========= Todoist: タスク完了 =========
+@csrf_exempt
+@require_POST
+async def api_todoist_close_task(request):
+    if not http_client.has_token("todoist"):
+        return JsonResponse({"error": "TODOIST_TOKEN is not set"}, status=500)
+
+    body = _json_body(request)
+    if body is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    task_id = body.get("taskId")
+
+    if not task_id:
+        return JsonResponse({"error": "taskId is required"}, status=400)
+
+    try:
+        r = await async_http_client.post(
+            "todoist", f"rest/v2/tasks/{task_id}/close", retry=True
+        )
+        if r.status_code not in (204, 200):
+            return _todoist_failed("close", r)
+        await sync_to_async(todoist.record_closed)(task_id)
+        return JsonResponse({"ok": True})
+    except Exception as e:
+        return JsonResponse({"error": "Todoist exception", "detail": str(e)}, status=502)
+
+
+# ========= Todoist: まとめて操作 =========
+@csrf_exempt
+@require_POST
+async def api_todoist_batch(request):
+    if not http_client.has_token("todoist"):
+        return JsonResponse({"error": "TODOIST_TOKEN is not set"}, status=500)
+
+    ops, error = _batch_ops(request)
+    if error:
+        return JsonResponse({"error": error}, status=400)
+
+    limit = asyncio.Semaphore(settings.TODOIST_BATCH_WORKERS)
+
+    async def run(op):
+        try:
+            method, path, kwargs = todoist.plan_op(op)
+        except ValueError as e:
+            return {"ok": False, "error": str(e)}
+        try:
+            async with limit:
+                r = await async_http_client.request("todoist", method, path, **kwargs)
+            return todoist.op_result(op, r)
+        except Exception as e:
+            return {"ok": False, "error": "Todoist exception", "detail": str(e)}
+
+    results = await asyncio.gather(*(run(op) for op in ops))
+    await sync_to_async(todoist.record_results)(ops, results)
+    return JsonResponse({"results": results})
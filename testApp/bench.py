@@ -0,0 +1,226 @@
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+
+# ========= 負荷ベンチマーク（Web 層） =========
+# 並行クライアント（スレッドごとに django.test.Client）で各シナリオを叩き、
+# レイテンシの p50/p95/p99・スループット・1 リクエストあたりのクエリ数を測る。
+# クエリ数は RequestTimingMiddleware の Server-Timing ヘッダから読む。
+# ストリーミングの本文はヘッダを付けた後に読まれるので、読み切る間のクエリを数えて足す。
+
+_QUERIES_RE = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: object  # (rng, env) -> URL
+    login: bool = False
+
+
+def _timeline_search(rng, env):
+    return reverse("timeline") + "?q=" + rng.choice(env["search_terms"])
+
+
+def _post_detail(rng, env):
+    return reverse("post_detail", args=[rng.choice(env["post_ids"])])
+
+
+def _like_post(rng, env):
+    return reverse("like_post", args=[rng.choice(env["post_ids"])])
+
+
+def _sound_stream(rng, env):
+    return reverse("api_sound_stream", args=[rng.choice(env["sound_ids"])])
+
+
+SCENARIOS = [
+    Scenario("timeline", "GET", lambda rng, env: reverse("timeline")),
+    # ログイン中はページキャッシュを通らないので、描画の速さはこちらで見る
+    Scenario("timeline_user", "GET", lambda rng, env: reverse("timeline"), login=True),
+    Scenario("timeline_search", "GET", _timeline_search),
+    Scenario("post_detail", "GET", _post_detail),
+    Scenario("like_post", "POST", _like_post, login=True),
+    Scenario("api_posts", "GET", lambda rng, env: reverse("api_posts")),
+    Scenario("api_posts_ndjson", "GET", lambda rng, env: reverse("api_posts") + "?format=ndjson"),
+    Scenario("api_sound", "GET", lambda rng, env: reverse("api_sound") + "?tag=rain"),
+    Scenario("api_sound_stream", "GET", _sound_stream),
+    Scenario("api_todoist_tasks", "GET", lambda rng, env: reverse("api_todoist_tasks")),
+    Scenario("api_time_utc", "GET", lambda rng, env: reverse("api_time_utc")),
+]
+
+
+def percentile(values, pct):
+    """nearest-rank 方式のパーセンタイル。"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _consume(response):
+    """ストリーミングの本文を読み切り、その間に実行したクエリ数を返す。"""
+    count = 0
+
+    def counter(execute, sql, params, many, context):
+        nonlocal count
+        count += 1
+        return execute(sql, params, many, context)
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        b"".join(response.streaming_content)
+    return count
+
+
+def _worker(scenario, env, count, seed, user_id, samples, lock):
+    rng = random.Random(seed)
+    client = Client()
+    if scenario.login:
+        client.force_login(env["users"][user_id % len(env["users"])])
+    send = client.post if scenario.method == "POST" else client.get
+    try:
+        for _ in range(count):
+            url = scenario.path(rng, env)
+            started = time.perf_counter()
+            response = send(url)
+            body_queries = _consume(response) if getattr(response, "streaming", False) else 0
+            elapsed = time.perf_counter() - started
+
+            match = _QUERIES_RE.search(response.get("Server-Timing", ""))
+            queries = (int(match.group(1)) if match else 0) + body_queries
+            with lock:
+                samples.append((elapsed, queries, response.status_code >= 400))
+    finally:
+        connections.close_all()
+
+
+def run_scenario(scenario, env, requests, concurrency, seed=0, warmup=0):
+    """シナリオを concurrency 本のスレッドで合計 requests 回実行して結果を返す。"""
+    if warmup:
+        _worker(scenario, env, warmup, seed - 1, 0, [], threading.Lock())
+
+    samples = []
+    lock = threading.Lock()
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    threads = [
+        threading.Thread(
+            target=_worker, args=(scenario, env, share, seed + i, i, samples, lock)
+        )
+        for i, share in enumerate(shares)
+        if share
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies = [s[0] * 1000 for s in samples]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if s[2]),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "rps": round(len(samples) / wall, 1) if wall else 0.0,
+        "queries": round(sum(s[1] for s in samples) / len(samples), 2) if samples else 0.0,
+    }
+
+
+def compare(results, baseline, tolerance, slack_ms=10):
+    """
+    ベースラインと比べて悪化した項目のリストを返す（空なら合格）。
+    - レイテンシ（p50/p95）が (1 + tolerance) 倍かつ slack_ms 以上遅くなった
+      （p99 はサンプルが少なくぶれるので表示だけ）
+    - スループットが (1 - tolerance) 倍を下回った
+    - 1 リクエストあたりのクエリ数が増えた（マシンに依存しないので許容幅なし）
+    - エラーが増えた
+    """
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        current = results.get(name)
+        if current is None:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            limit = max(base[key] * (1 + tolerance), base[key] + slack_ms)
+            if current[key] > limit:
+                regressions.append(f"{name}: {key} {base[key]} -> {current[key]}")
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']} -> {current['rps']}")
+        if current["queries"] > base["queries"] + 0.5:
+            regressions.append(f"{name}: queries {base['queries']} -> {current['queries']}")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {current['errors']}")
+    return regressions
+
+
+# ========= SQLite の書き込み競合ベンチマーク =========
+# gunicorn の複数ワーカーを真似て、プロセスごとにいいねの付け外し（書き込み）と
+# タイムラインの読み込みを seconds 秒間繰り返し、回数とエラー数を数える。
+
+def _contention_worker(kind, db_name, options, retries, seconds, seed, env, queue):
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    from .models import Post
+
+    # fork 元の接続は使わず、このプロセス用の設定でつなぎ直す
+    connection.settings_dict.update(NAME=db_name, OPTIONS=options)
+    connection.connection = None
+    rng = random.Random(seed)
+    done = errors = 0
+    deadline = time.perf_counter() + seconds
+    with override_settings(DB_LOCK_RETRIES=retries):
+        while time.perf_counter() < deadline:
+            try:
+                if kind == "write":
+                    Post.objects.toggle_like(rng.choice(env["post_ids"]), rng.choice(env["user_ids"]))
+                else:
+                    list(Post.objects.for_cards().order_by("-created_at", "-id")[:20])
+                done += 1
+            except Exception:
+                errors += 1
+    connection.close()
+    queue.put((kind, done, errors))
+
+
+def run_contention(db_name, options, retries, env, writers, readers, seconds, seed=0):
+    """書き込み writers 本・読み込み readers 本のプロセスで回して、種類ごとの結果を返す。"""
+    import multiprocessing
+
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    kinds = ["write"] * writers + ["read"] * readers
+    processes = [
+        context.Process(
+            target=_contention_worker,
+            args=(kind, db_name, options, retries, seconds, seed + i, env, queue),
+        )
+        for i, kind in enumerate(kinds)
+    ]
+    for process in processes:
+        process.start()
+    results = {"write": [0, 0], "read": [0, 0]}
+    for _ in processes:
+        kind, done, errors = queue.get()
+        results[kind][0] += done
+        results[kind][1] += errors
+    for process in processes:
+        process.join()
+
+    return {
+        f"{kind}s_per_sec": round(done / seconds, 1) for kind, (done, _) in results.items()
+    } | {f"{kind}_errors": errors for kind, (_, errors) in results.items()}
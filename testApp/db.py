@@ -0,0 +1,40 @@
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+from . import metrics
+
+
+# ========= SQLite の書き込み競合 =========
+# PRAGMA（WAL / busy_timeout など）と BEGIN IMMEDIATE は settings.DATABASES の
+# OPTIONS で接続ごとに設定している。それでも busy_timeout 内にロックが取れなかった
+# 短い書き込みは、ここでジッター付きでやり直す。
+
+def is_locked_error(exc):
+    message = str(exc)
+    return "database is locked" in message or "database table is locked" in message
+
+
+def retry_on_locked(func):
+    """
+    "database is locked" で失敗したら DB_LOCK_RETRIES 回までやり直す。
+    外側のトランザクションの中では（やり直しても意味がないので）そのまま例外を上げる。
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        attempts = 1 + settings.DB_LOCK_RETRIES
+        for attempt in range(attempts):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                last = attempt == attempts - 1
+                if last or connection.in_atomic_block or not is_locked_error(e):
+                    raise
+                metrics.DB_LOCK_RETRIES.inc(function=func.__qualname__)
+                time.sleep(random.uniform(0, settings.DB_LOCK_RETRY_BACKOFF * (2 ** attempt)))
+
+    return wrapper
@@ -0,0 +1,19 @@
+import json
+import logging
+import random
+
+from django.conf import settings
+
+
+# ========= 構造化ログ（サンプリング付き） =========
+# 1 行 1 JSON。正常系は LOG_SAMPLE_RATE の割合だけ出し、警告以上は必ず出す。
+
+logger = logging.getLogger("testApp.events")
+
+
+def log_event(event, level=logging.INFO, **fields):
+    if level < logging.WARNING and random.random() >= settings.LOG_SAMPLE_RATE:
+        return
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(level, json.dumps({"event": event, **fields}, ensure_ascii=False, default=str))
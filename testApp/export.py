@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+import zlib
+
+from .models import Post
+
+
+# ========= 投稿・いいねの一括エクスポート =========
+# values_list().iterator(chunk_size) で少しずつ読み（PostgreSQL ではサーバーサイドカーソル）、
+# CSV / NDJSON の文字列チャンクにして流す。件数が増えてもメモリ使用量は変わらない。
+# 管理コマンド（export_data）と管理画面のアクションの両方から使う。
+
+CHUNK_SIZE = 2000
+FORMATS = ("csv", "ndjson")
+
+# テーブル名 -> ({出力する列名: values_list に渡す列}, 元の QuerySet)
+TABLES = {
+    "posts": (
+        {
+            "id": "id",
+            "author_id": "author_id",
+            "author": "author__username",
+            "content": "content",
+            "created_at": "created_at",
+            "like_count": "like_count",
+        },
+        lambda: Post.objects.all(),
+    ),
+    "likes": (
+        {"id": "id", "post_id": "post_id", "user_id": "user_id"},
+        lambda: Post.likes.through.objects.all(),
+    ),
+}
+
+
+def export_rows(table, queryset=None, chunk_size=CHUNK_SIZE):
+    """(列名, 行タプルのイテレーター)。queryset を渡せばその範囲だけ（管理画面用）。"""
+    columns, default = TABLES[table]
+    queryset = default() if queryset is None else queryset
+    rows = queryset.order_by("pk").values_list(*columns.values()).iterator(chunk_size=chunk_size)
+    return list(columns), rows
+
+
+def _cell(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def csv_chunks(columns, rows, chunk_size=CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for i, row in enumerate(rows, 1):
+        writer.writerow([_cell(v) for v in row])
+        if i % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def ndjson_chunks(columns, rows, chunk_size=CHUNK_SIZE):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, map(_cell, row))), ensure_ascii=False))
+        if len(lines) >= chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def encode(chunks, compress=False):
+    """文字列チャンクを UTF-8 のバイト列に（compress なら gzip で少しずつ圧縮して）する。"""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode("utf-8")
+        return
+
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip ヘッダ付き
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export(table, fmt, compress=False, queryset=None, chunk_size=CHUNK_SIZE):
+    """エクスポート全体をバイト列のチャンクで返す。"""
+    columns, rows = export_rows(table, queryset, chunk_size)
+    chunks = (csv_chunks if fmt == "csv" else ndjson_chunks)(columns, rows, chunk_size)
+    return encode(chunks, compress)
+
+
+def filename(table, fmt, compress=False):
+    return f"{table}.{fmt}" + (".gz" if compress else "")
@@ -0,0 +1,106 @@
+import os
+import re
+
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+
+# ========= Range / 条件付きリクエスト対応のファイル配信 =========
+# 末尾までの範囲（ブラウザの <audio> が送る "bytes=N-" など）は FileResponse を
+# そのまま返すので、gunicorn 等では wsgi.file_wrapper 経由で sendfile される。
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _LimitedFile:
+    """途中で終わる範囲用。fileno を持たせないので sendfile には回らない。"""
+
+    def __init__(self, f, length):
+        self._f = f
+        self._remaining = length
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._f.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._f.close()
+
+
+def _parse_range(header, size):
+    """
+    単一範囲だけを扱う。戻り値は (start, end)、範囲指定なしとして扱うなら None、
+    満たせない範囲なら False。
+    """
+    m = RANGE_RE.match(header.strip())
+    if not m:
+        return None  # 複数範囲や不正な形式は無視して全体を返す
+    first, last = m.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # "bytes=-500"：末尾 500 バイト
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def ranged_file_response(request, path, content_type, etag, max_age=60 * 60 * 24):
+    stat = os.stat(path)
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+
+    # If-None-Match / If-Modified-Since など → 304 / 412
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if range_header and _if_range_matches(request.headers.get("If-Range"), etag, last_modified):
+        byte_range = _parse_range(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    f = open(path, "rb")
+    if byte_range is None:
+        response = FileResponse(f, content_type=content_type)
+    else:
+        start, end = byte_range
+        f.seek(start)
+        if end == size - 1:
+            response = FileResponse(f, content_type=content_type)
+        else:
+            response = FileResponse(_LimitedFile(f, end - start + 1), content_type=content_type)
+        response.status_code = 206
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = f"public, max-age={max_age}"
+    return response
+
+
+def _if_range_matches(if_range, etag, last_modified):
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
@@ -0,0 +1,64 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import metrics
+
+
+# ========= 投稿カードの描画キャッシュ =========
+# キーに post.version を含めるので、編集・いいねで version が上がれば
+# 古い断片は自然に参照されなくなる（明示的な削除は不要）。
+
+CARD_TEMPLATE = "_post_card.html"
+# CARD_TEMPLATE の中身を変えたら上げる（古い描画結果を使わないように）
+CARD_MARKUP_VERSION = 3
+
+# viewer_liked（with_viewer_liked の注釈）ごとに描画を分ける。None は匿名
+_LIKED_VARIANTS = {None: "a", True: "1", False: "0"}
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _card_key(post, liked=None):
+    return f"post_card:{CARD_MARKUP_VERSION}:{post.pk}:{post.version}:{_LIKED_VARIANTS[liked]}"
+
+
+def render_post_cards(posts):
+    """投稿カードをまとめて描画し、連結した HTML を返す。キャッシュは get_many 1 回。"""
+    keys = [_card_key(post, getattr(post, "viewer_liked", None)) for post in posts]
+    cached = cache.get_many(keys)
+
+    fresh = {}
+    parts = []
+    for post, key in zip(posts, keys):
+        html = cached.get(key)
+        if html is None:
+            html = render_to_string(CARD_TEMPLATE, {"post": post})
+            fresh[key] = html
+        parts.append(html)
+
+    if fresh:
+        cache.set_many(fresh, settings.POST_CARD_CACHE_TIMEOUT)
+
+    with _stats_lock:
+        _stats["hits"] += len(keys) - len(fresh)
+        _stats["misses"] += len(fresh)
+    if keys:
+        metrics.POST_CARD_CACHE.inc(len(keys) - len(fresh), result="hit")
+        metrics.POST_CARD_CACHE.inc(len(fresh), result="miss")
+
+    return mark_safe("".join(parts))
+
+
+def invalidate_post_card(post):
+    cache.delete_many([_card_key(post, liked) for liked in _LIKED_VARIANTS])
+
+
+def fragment_cache_stats():
+    """このプロセスでのヒット / ミス件数。"""
+    with _stats_lock:
+        return dict(_stats)
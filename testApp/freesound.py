@@ -0,0 +1,232 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+
+from . import http_client
+from .eventlog import log_event
+from .swr import SWRCache
+
+
+# ========= Freesound: 検索結果のキャッシュ =========
+
+SEARCH_PATH = "search/text/"
+
+logger = logging.getLogger(__name__)
+
+
+class FreesoundError(Exception):
+    """Freesound の応答を解釈できなかったとき。payload はそのまま JSON で返せる形。"""
+
+    def __init__(self, payload):
+        super().__init__(payload.get("error"))
+        self.payload = payload
+
+
+def search_params(tag):
+    token = os.environ.get("FREESOUND_TOKEN")
+
+    # ✅ Freesound は query パラメータ token= でも、Authorization: Token xxxx でもOK
+    # 念のため両方つけておく（ヘッダは http_client が付ける）
+    return {
+        "query": tag,
+        "page_size": 20,
+        "fields": "id,name,previews",
+        "token": token,
+    }
+
+
+def parse_search_response(tag, r):
+    """requests / httpx どちらのレスポンスでも使える。"""
+    if r.status_code != 200:
+        # 失敗時だけレスポンスの先頭をログに出す（全部は長すぎるので）
+        log_event(
+            "freesound_search_failed",
+            level=logging.WARNING,
+            tag=tag,
+            status=r.status_code,
+            content_type=r.headers.get("Content-Type"),
+            body_preview=r.text[:400],
+        )
+
+    # ステータスコードが 200 以外なら例外にして呼び出し側でまとめて処理
+    r.raise_for_status()
+
+    try:
+        data = r.json()
+    except ValueError as e:
+        log_event(
+            "freesound_search_failed",
+            level=logging.WARNING,
+            tag=tag,
+            error=str(e),
+            body_preview=r.text[:400],
+        )
+        raise FreesoundError(
+            {
+                "error": "Freesound JSON parse error",
+                "detail": str(e),
+                "raw": r.text[:200],
+            }
+        )
+
+    results = data.get("results") or []
+    log_event("freesound_search", tag=tag, results=len(results))
+    return results
+
+
+def normalize_tag(value, default="rain"):
+    """
+    ?tag= をキャッシュのキーにする前にそろえる（大文字小文字・空白の違いで別キーにしない）。
+    長すぎるものは切る。
+    """
+    tag = " ".join((value or "").split()).lower()[: settings.FREESOUND_TAG_MAX_LENGTH]
+    return tag or default
+
+
+def search_sounds(tag):
+    """Freesound でタグ検索して results のリストを返す（キャッシュなし）。"""
+    r = http_client.get("freesound", SEARCH_PATH, params=search_params(tag))
+    return parse_search_response(tag, r)
+
+
+# タグごとの検索結果。api_sound はここから random.choice する。
+sound_search_cache = SWRCache(
+    search_sounds,
+    ttl=settings.FREESOUND_SEARCH_TTL,
+    stale_ttl=settings.FREESOUND_SEARCH_STALE_TTL,
+    # キーは利用者が決めるタグなので、件数に上限を付ける
+    max_entries=settings.FREESOUND_SEARCH_MAX_TAGS,
+)
+
+
+# ========= Freesound: プレビュー MP3 のローカルキャッシュ =========
+# SOUND_PREVIEW_CACHE_DIR に <id>.mp3 として保存し、合計サイズが
+# SOUND_PREVIEW_CACHE_MAX_BYTES を超えたら最後に使われた時刻（atime）の古い順に消す。
+# 配信するのは api_sound が返した ID だけ（任意の ID で Freesound を叩かせない）。
+
+_preview_urls = OrderedDict()  # sound_id -> プレビュー URL（api_sound で見たもの）
+_preview_urls_max = 1000
+_download_lock = threading.Lock()
+_download_locks = {}  # sound_id -> [Lock, 待っている数]（同じファイルの同時ダウンロードを防ぐ）
+PART_MAX_AGE = 60 * 10
+
+
+def _preview_dir():
+    return Path(settings.SOUND_PREVIEW_CACHE_DIR)
+
+
+def preview_path(sound_id):
+    return _preview_dir() / f"{int(sound_id)}.mp3"
+
+
+def cached_preview(sound_id):
+    """キャッシュ済みならパスを返し、LRU 用に atime を更新する。"""
+    path = preview_path(sound_id)
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    # mtime（= Last-Modified）は変えずに atime だけ進める
+    os.utime(path, (time.time(), st.st_mtime))
+    return path
+
+
+def remember_preview_url(sound_id, url):
+    with _download_lock:
+        _preview_urls[sound_id] = url
+        _preview_urls.move_to_end(sound_id)
+        while len(_preview_urls) > _preview_urls_max:
+            _preview_urls.popitem(last=False)
+
+
+def preview_url_for(sound_id):
+    """api_sound が返したプレビューの URL。それ以外の ID は None（Freesound には聞かない）。"""
+    with _download_lock:
+        return _preview_urls.get(sound_id)
+
+
+def download_preview(sound_id, url):
+    """プレビューを取得してキャッシュに置き、パスを返す。"""
+    with _download_lock:
+        entry = _download_locks.setdefault(sound_id, [threading.Lock(), 0])
+        entry[1] += 1
+    lock = entry[0]
+
+    try:
+        with lock:
+            path = cached_preview(sound_id)
+            if path is not None:
+                return path
+
+            directory = _preview_dir()
+            directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as out, http_client.get("freesound", url, stream=True) as r:
+                    r.raise_for_status()
+                    for chunk in r.iter_content(chunk_size=64 * 1024):
+                        out.write(chunk)
+                # 書き終わってから置き換えるので、配信側が書きかけを読むことはない
+                os.replace(tmp, preview_path(sound_id))
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+    finally:
+        # 最後の 1 人が抜けるまでロックを残す（待っている人と新しく来た人が同じロックを使う）
+        with _download_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                _download_locks.pop(sound_id, None)
+
+    evict_previews()
+    return preview_path(sound_id)
+
+
+def prefetch_preview(sound_id, url):
+    """api_sound から呼ぶ。裏でダウンロードして、次回からローカル URL を返せるようにする。"""
+    with _download_lock:
+        if sound_id in _download_locks:
+            return
+
+    def run():
+        try:
+            download_preview(sound_id, url)
+        except Exception:
+            logger.warning("preview prefetch failed for %s", sound_id, exc_info=True)
+
+    threading.Thread(target=run, name=f"preview-{sound_id}", daemon=True).start()
+
+
+def evict_previews():
+    directory = _preview_dir()
+    files = []
+    total = 0
+    # 書き込みが PART_MAX_AGE 秒止まっている .part は、失敗したダウンロードの残り
+    stale_before = time.time() - PART_MAX_AGE
+    for entry in os.scandir(directory):
+        try:
+            st = entry.stat()
+            if entry.name.endswith(".part") and st.st_mtime < stale_before:
+                os.unlink(entry.path)
+        except FileNotFoundError:
+            continue  # 同時に消された
+        if entry.name.endswith(".mp3"):
+            files.append((st.st_atime, st.st_size, entry.path))
+            total += st.st_size
+
+    limit = settings.SOUND_PREVIEW_CACHE_MAX_BYTES
+    for _, size, path in sorted(files):
+        if total <= limit:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
@@ -0,0 +1,207 @@
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from . import metrics, timing
+from .eventlog import log_event
+
+
+# ========= 外部 API 用の共有 HTTP クライアント =========
+# 上流（freesound / todoist）ごとに Session を 1 つ持ち、コネクションプールで
+# TCP+TLS 接続を使い回す。設定は settings.HTTP_UPSTREAMS。
+#
+# - 認証ヘッダとタイムアウトはここで付ける（ビュー側では書かない）
+# - 冪等なリクエストは接続エラー / 429 / 5xx でジッター付きリトライ
+# - 連続で失敗した上流はサーキットブレーカーでしばらく呼ばない
+
+RETRY_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class UpstreamUnavailable(requests.exceptions.RequestException):
+    """サーキットブレーカーが開いていて呼び出しを見送ったとき。"""
+
+
+class CircuitBreaker:
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            # half-open：1 本だけ試しに通す
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """結果が分からないまま終わった呼び出し（割り込み・キャンセル）の後始末。"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+
+class Upstream:
+
+    def __init__(self, name, config):
+        self.name = name
+        self.base_url = config["base_url"]
+        self.timeout = config.get("timeout", 10)
+        self.retries = config.get("retries", 2)
+        self.backoff = config.get("backoff", 0.2)
+        self.token_env = config.get("token_env")
+        self.auth_scheme = config.get("auth_scheme", "Bearer")
+        self.breaker = CircuitBreaker(
+            config.get("breaker_threshold", 5), config.get("breaker_cooldown", 30)
+        )
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=config.get("pool_connections", 4),
+            pool_maxsize=config.get("pool_maxsize", 10),
+            max_retries=0,  # リトライはこのモジュールで行う
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @property
+    def token(self):
+        return os.environ.get(self.token_env) if self.token_env else None
+
+    def url(self, path):
+        if path.startswith(("http://", "https://")):
+            return path
+        return self.base_url + path.lstrip("/")
+
+    def headers(self, url):
+        # 認証ヘッダは自分の API にだけ付ける（CDN の絶対 URL などには付けない）
+        token = self.token
+        if token and url.startswith(self.base_url):
+            return {"Authorization": f"{self.auth_scheme} {token}"}
+        return {}
+
+    def observe(self, method, url, started, status=None, error=None, timeout=False):
+        """1 回の呼び出し（リトライは別々に数える）をメトリクスとログに残す。"""
+        seconds = time.perf_counter() - started
+        metrics.observe_upstream(self.name, method, seconds, status=status, timeout=timeout)
+        timing.record_http(seconds)
+
+        failed = error is not None or status >= 500
+        log_event(
+            "upstream_request",
+            level=logging.WARNING if failed else logging.INFO,
+            upstream=self.name,
+            method=method,
+            path=url.split("?", 1)[0],
+            status=status,
+            duration_ms=round(seconds * 1000, 1),
+            error=repr(error) if error is not None else None,
+        )
+
+    def request(self, method, path, retry=None, **kwargs):
+        method = method.upper()
+        url = self.url(path)
+        headers = {**self.headers(url), **kwargs.pop("headers", {})}
+        kwargs.setdefault("timeout", self.timeout)
+        if retry is None:
+            retry = method in RETRY_METHODS
+        attempts = 1 + (self.retries if retry else 0)
+
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                raise UpstreamUnavailable(f"{self.name}: circuit open")
+
+            last = attempt == attempts - 1
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, headers=headers, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.observe(
+                    method, url, started,
+                    error=e, timeout=isinstance(e, requests.exceptions.Timeout),
+                )
+                self.breaker.record_failure()
+                if last:
+                    raise
+            except requests.exceptions.RequestException as e:
+                # リダイレクトの上限・壊れた応答など。リトライはしないが失敗として数える
+                self.observe(method, url, started, error=e)
+                self.breaker.record_failure()
+                raise
+            except BaseException:
+                # half-open の試行枠を握ったままにしない（ブレーカーが開きっぱなしになる）
+                self.breaker.release_trial()
+                raise
+            else:
+                self.observe(method, url, started, status=response.status_code)
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if last or response.status_code not in RETRY_STATUSES:
+                    return response
+                response.close()
+
+            # full jitter
+            time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+
+_upstreams = {}
+_upstreams_lock = threading.Lock()
+
+
+def get_upstream(name):
+    with _upstreams_lock:
+        upstream = _upstreams.get(name)
+        if upstream is None:
+            upstream = _upstreams[name] = Upstream(name, settings.HTTP_UPSTREAMS[name])
+        return upstream
+
+
+def request(upstream, method, path, **kwargs):
+    return get_upstream(upstream).request(method, path, **kwargs)
+
+
+def get(upstream, path, **kwargs):
+    return request(upstream, "GET", path, **kwargs)
+
+
+def post(upstream, path, **kwargs):
+    return request(upstream, "POST", path, **kwargs)
+
+
+def has_token(upstream):
+    return bool(get_upstream(upstream).token)
@@ -0,0 +1,91 @@
+import asyncio
+import itertools
+import json
+import threading
+
+from django.conf import settings
+
+
+# ========= タイムラインのライブ更新（プロセス内 pub/sub） =========
+# post_create / like_post が publish し、SSE（async_views.timeline_events）の各接続が
+# asyncio.Queue で受け取る。待っている間はイベントループで眠っているだけなので、
+# 開きっぱなしの接続はほとんど CPU を使わない（ポーリングなし）。
+#
+# 配信は同じプロセス内だけ。ASGI のワーカーを複数にすると、別ワーカーで起きた
+# 書き込みは届かない（その場合は Redis の pub/sub などに差し替える）。
+
+_lock = threading.Lock()
+_subscribers = set()  # Subscription
+_ids = itertools.count(1)
+
+
+class Subscription:
+    """1 接続分の受信箱。publish は別スレッドからでもよい。"""
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def _put(self, message):
+        # 読むのが遅い接続は古いものから捨てる（書き込み側は待たせない）
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    def deliver(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # ループが閉じている（切断済み）
+
+    async def get(self, timeout):
+        """次のイベント（SSE の文字列）。timeout 秒来なければ None。"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def subscribe():
+    subscription = Subscription(asyncio.get_running_loop(), settings.LIVE_QUEUE_SIZE)
+    with _lock:
+        _subscribers.add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription):
+    with _lock:
+        _subscribers.discard(subscription)
+
+
+def subscriber_count():
+    with _lock:
+        return len(_subscribers)
+
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def publish(event, data):
+    """全接続にイベントを送る。購読者がいなければ何もしない。"""
+    with _lock:
+        subscribers = list(_subscribers)
+    if not subscribers:
+        return
+    message = format_event(event, data, next(_ids))
+    for subscription in subscribers:
+        subscription.deliver(message)
+
+
+def publish_post(post):
+    publish("post", {"id": post.pk, "author": post.author.username})
+
+
+def publish_like(post_id, like_count):
+    publish("like", {"id": post_id, "count": like_count})
@@ -0,0 +1,175 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.utils import timezone
+
+from testApp import bench
+from testApp.freesound import preview_path, sound_search_cache
+from testApp.models import Post, TodoistSyncState, TodoistTask
+from testApp.seeding import WORDS, seed_database
+
+DEFAULT_BASELINE = settings.BASE_DIR / "benchmarks" / "baseline.json"
+
+# 外部 API には出ない（誤って呼んでもすぐ失敗する宛先にしておく）
+OFFLINE_UPSTREAMS = {
+    name: {**config, "base_url": "http://127.0.0.1:9/", "retries": 0, "timeout": 1}
+    for name, config in settings.HTTP_UPSTREAMS.items()
+}
+
+SOUND_COUNT = 20
+PREVIEW_BYTES = 64 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "使い捨ての DB にダミーデータを入れて主要な画面・API に並行リクエストを送り、"
+        "p50/p95/p99・スループット・クエリ数をベースライン JSON と比べる（悪化したら失敗）"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--posts", type=int, default=2000)
+        parser.add_argument("--likes", type=int, default=10000)
+        parser.add_argument("--requests", type=int, default=200, help="シナリオごとのリクエスト数")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--scenario", action="append", help="実行するシナリオ（複数可）")
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+        parser.add_argument(
+            "--tolerance", type=float, default=0.5,
+            help="レイテンシ・スループットの許容幅（0.5 なら ±50%%）",
+        )
+        parser.add_argument("--output", help="結果の JSON を書き出す先")
+        parser.add_argument(
+            "--update-baseline", action="store_true", help="比較せずに結果をベースラインとして保存する"
+        )
+
+    def handle(self, *args, **options):
+        scenarios = bench.SCENARIOS
+        if options["scenario"]:
+            unknown = set(options["scenario"]) - {s.name for s in scenarios}
+            if unknown:
+                raise CommandError(f"unknown scenario: {', '.join(sorted(unknown))}")
+            scenarios = [s for s in scenarios if s.name in options["scenario"]]
+
+        config = {
+            key: options[key]
+            for key in ("users", "posts", "likes", "requests", "concurrency", "seed")
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            results = self.run(scenarios, config, Path(tmp))
+
+        report = {"config": config, "scenarios": results}
+        self.print_table(results)
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2) + "\n")
+
+        baseline_path = Path(options["baseline"])
+        if options["update_baseline"]:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"ベースラインを更新しました: {baseline_path}"))
+            return
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING(f"ベースラインがありません: {baseline_path}"))
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        if baseline.get("config") != config:
+            self.stdout.write(
+                self.style.WARNING(f"ベースラインと条件が違います: {baseline.get('config')}")
+            )
+        regressions = bench.compare(results, baseline, options["tolerance"])
+        if regressions:
+            raise CommandError("性能が悪化しました:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("ベースラインと比べて悪化はありません"))
+
+    def run(self, scenarios, config, tmp):
+        # SQLite はスレッドごとに接続するので、インメモリではなくファイルの DB を使う
+        if connection.vendor == "sqlite":
+            connection.settings_dict["TEST"]["NAME"] = str(tmp / "bench.sqlite3")
+
+        overrides = override_settings(
+            SERVER_TIMING=True,
+            SLOW_REQUEST_MS=10 ** 9,
+            LOG_SAMPLE_RATE=0,
+            METRICS_DIR=None,
+            HTTP_UPSTREAMS=OFFLINE_UPSTREAMS,
+            TODOIST_SYNC_INTERVAL=10 ** 9,
+            SOUND_PREVIEW_CACHE_DIR=str(tmp / "sound_cache"),
+            # 本番（REDIS_URL あり）と同じく匿名ページキャッシュを使う。1 プロセスなので LocMem でよい
+            PAGE_CACHE_TIMEOUT=60 * 10,
+        )
+        tokens = mock.patch.dict(os.environ, {"FREESOUND_TOKEN": "bench", "TODOIST_TOKEN": "bench"})
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={"default"})
+        try:
+            with overrides, tokens:
+                env = self.prepare(config)
+                results = {}
+                for scenario in scenarios:
+                    self.stdout.write(f"{scenario.name} ...")
+                    results[scenario.name] = bench.run_scenario(
+                        scenario, env, config["requests"], config["concurrency"],
+                        seed=config["seed"], warmup=config["concurrency"],
+                    )
+                sound_search_cache.clear()
+                return results
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def prepare(self, config):
+        user_ids = seed_database(
+            config["users"], config["posts"], config["likes"], seed=config["seed"]
+        )
+
+        # Todoist はミラーから返す（同期済みにしておく）
+        TodoistTask.objects.bulk_create(
+            [TodoistTask(id=str(i), content=f"task {i}", order=i) for i in range(50)]
+        )
+        TodoistSyncState.objects.update_or_create(pk=1, defaults={"synced_at": timezone.now()})
+
+        # Freesound は検索結果とプレビュー MP3 をキャッシュ済みにしておく
+        sounds = []
+        for sound_id in range(1, SOUND_COUNT + 1):
+            path = preview_path(sound_id)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(os.urandom(PREVIEW_BYTES))
+            sounds.append({
+                "id": sound_id,
+                "name": f"rain {sound_id}",
+                "previews": {"preview-hq-mp3": f"http://127.0.0.1:9/{sound_id}.mp3"},
+            })
+        sound_search_cache.set("rain", sounds)
+
+        return {
+            "users": list(User.objects.filter(id__in=user_ids).order_by("id")),
+            "post_ids": list(Post.objects.values_list("id", flat=True)),
+            "sound_ids": [s["id"] for s in sounds],
+            "search_terms": WORDS,
+        }
+
+    def print_table(self, results):
+        header = f"{'scenario':<20}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>9}{'queries':>9}{'errors':>8}"
+        self.stdout.write(header)
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<20}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}"
+                f"{r['rps']:>9}{r['queries']:>9}{r['errors']:>8}"
+            )
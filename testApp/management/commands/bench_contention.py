@@ -0,0 +1,86 @@
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import setup_databases, teardown_databases
+
+from testApp import bench
+from testApp.models import Post
+from testApp.seeding import seed_database
+
+# Django の既定（rollback ジャーナル・DEFERRED・リトライなし）と settings の設定を比べる
+PROFILES = {
+    "default": {"journal_mode": "delete", "options": {}, "retries": 0},
+    "tuned": {
+        "journal_mode": None,
+        "options": settings.DATABASES["default"].get("OPTIONS", {}),
+        "retries": settings.DB_LOCK_RETRIES,
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "複数プロセスからいいね（書き込み）とタイムライン（読み込み）を同時に流し、"
+        "SQLite の既定設定とチューニング後（WAL / busy_timeout / BEGIN IMMEDIATE / リトライ）を比べる"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5)
+        parser.add_argument("--posts", type=int, default=200)
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--dir", default=str(settings.BASE_DIR),
+            help="DB ファイルを置く場所（fsync のコストも測るので tmpfs は避ける）",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("SQLite のときだけ使えます")
+
+        with tempfile.TemporaryDirectory(prefix=".bench-", dir=options["dir"]) as tmp:
+            tmp = Path(tmp)
+            connection.settings_dict["TEST"]["NAME"] = str(tmp / "base.sqlite3")
+            old_config = setup_databases(verbosity=0, interactive=False, aliases={"default"})
+            try:
+                user_ids = seed_database(
+                    options["users"], options["posts"], options["posts"], seed=options["seed"]
+                )
+                env = {
+                    "post_ids": list(Post.objects.values_list("id", flat=True)),
+                    "user_ids": user_ids or list(User.objects.values_list("id", flat=True)),
+                }
+                base = connection.settings_dict["NAME"]
+                # fork する前に接続を閉じておく（子プロセスに引き継がない）
+                connections.close_all()
+
+                results = {}
+                for name, profile in PROFILES.items():
+                    db_name = str(tmp / f"{name}.sqlite3")
+                    shutil.copy(base, db_name)
+                    if profile["journal_mode"]:
+                        with sqlite3.connect(db_name) as conn:
+                            conn.execute(f"PRAGMA journal_mode={profile['journal_mode']}")
+                    self.stdout.write(f"{name} ...")
+                    results[name] = bench.run_contention(
+                        db_name, profile["options"], profile["retries"], env,
+                        options["writers"], options["readers"], options["seconds"],
+                        seed=options["seed"],
+                    )
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+        self.stdout.write(f"{'profile':<10}{'writes/s':>10}{'w.errors':>10}{'reads/s':>10}{'r.errors':>10}")
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<10}{r['writes_per_sec']:>10}{r['write_errors']:>10}"
+                f"{r['reads_per_sec']:>10}{r['read_errors']:>10}"
+            )
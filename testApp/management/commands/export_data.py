@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from testApp.export import CHUNK_SIZE, FORMATS, TABLES, export
+
+
+class Command(BaseCommand):
+    help = "投稿・いいねを CSV / NDJSON で書き出す（少しずつ読むので件数に関係なくメモリ一定）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("table", choices=sorted(TABLES))
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--output", "-o", default="-", help="出力先（- なら標準出力）")
+        parser.add_argument("--gzip", action="store_true", help="gzip で圧縮する（.gz の出力先なら自動）")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size は 1 以上を指定してください")
+        output = options["output"]
+        compress = options["gzip"] or output.endswith(".gz")
+        if compress and output == "-" and self.stdout.isatty():
+            raise CommandError("gzip の出力を端末には書けません。--output を指定してください")
+
+        started = time.perf_counter()
+        chunks = export(
+            options["table"], options["format"], compress, chunk_size=options["chunk_size"]
+        )
+        written = 0
+        if output == "-":
+            # 標準出力ならバイト列のまま書く。call_command(stdout=StringIO()) などの
+            # テキストのストリームには文字列にして書く（チャンクは UTF-8 の区切りで切れている）
+            buffer = getattr(self.stdout, "buffer", None)
+            if buffer is None and compress:
+                raise CommandError("gzip の出力をテキストのストリームには書けません。--output を指定してください")
+            for chunk in chunks:
+                if buffer is not None:
+                    buffer.write(chunk)
+                else:
+                    self.stdout.write(chunk.decode("utf-8"), ending="")
+                written += len(chunk)
+            self.stdout.flush()
+        else:
+            with open(output, "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+                    written += len(chunk)
+
+        self.stderr.write(
+            f"{options['table']}: {written} バイトを {time.perf_counter() - started:.1f} 秒で書き出しました"
+        )
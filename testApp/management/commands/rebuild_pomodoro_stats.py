@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from testApp.pomodoro_log import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "ポモドーロの日別集計をセッションのログから作り直す（集計がずれたとき用）"
+
+    def handle(self, *args, **options):
+        n = rebuild_daily_stats()
+        self.stdout.write(self.style.SUCCESS(f"{n} 件の日別集計を作りました"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from testApp.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "投稿の全文検索インデックスを作り直す（bulk_create などでシグナルを通らなかった分も反映）"
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        n = backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"{type(backend).__name__}: {n} 件をインデックスしました")
+        )
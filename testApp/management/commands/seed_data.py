@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from testApp.seeding import BATCH_SIZE, seed_database
+
+
+class Command(BaseCommand):
+    help = "ダミーのユーザー・投稿・いいねを高速に投入する（同じ --seed なら同じデータ）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--likes", type=int, default=500000, help="いいねの合計件数")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--days", type=int, default=365, help="投稿日時をさかのぼる日数")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        user_ids = seed_database(
+            options["users"],
+            options["posts"],
+            options["likes"],
+            seed=options["seed"],
+            days=options["days"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"users={len(user_ids)} posts={options['posts']} likes={options['likes']} "
+                f"を {time.perf_counter() - started:.1f} 秒で投入しました"
+            )
+        )
@@ -0,0 +1,217 @@
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+
+# ========= メトリクス（Prometheus テキスト形式） =========
+# 各プロセスはメモリ上で集計し、METRICS_DIR が設定されていれば
+# METRICS_FLUSH_INTERVAL 秒ごとに <dir>/metrics-<pid>.json へ書き出す。
+# /metrics は全ファイルを足し合わせて返すので、gunicorn の複数ワーカーでも
+# どのワーカーが応答しても同じ値になる（デプロイ時にディレクトリを空にすること）。
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_registry = {}  # name -> metric（定義順）
+_last_flush = 0.0
+
+
+def _label_key(labels):
+    return json.dumps(sorted(labels.items()), ensure_ascii=False)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.samples = {}  # label_key -> value
+        _registry[name] = self
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+        maybe_flush()
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.samples = {}  # label_key -> [bucket ごとの件数..., +Inf, sum, count]
+        _registry[name] = self
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with _lock:
+            sample = self.samples.get(key)
+            if sample is None:
+                sample = self.samples[key] = [0] * (len(self.buckets) + 3)
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    sample[i] += 1
+                    break
+            else:
+                sample[len(self.buckets)] += 1
+            sample[-2] += value
+            sample[-1] += 1
+        maybe_flush()
+
+
+# ========= 定義 =========
+
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds", "Latency of outbound API calls (per attempt)."
+)
+UPSTREAM_REQUESTS = Counter(
+    "upstream_requests_total", "Outbound API calls by upstream and HTTP status."
+)
+UPSTREAM_TIMEOUTS = Counter(
+    "upstream_timeouts_total", "Outbound API calls that timed out."
+)
+VIEW_DB_TIME = Histogram(
+    "view_db_query_duration_seconds", "Total ORM query time per request, by view."
+)
+POST_CARD_CACHE = Counter(
+    "post_card_cache_total", "Post card fragment cache lookups by result."
+)
+PAGE_CACHE = Counter(
+    "page_cache_total", "Anonymous full-page cache lookups by result."
+)
+DB_LOCK_RETRIES = Counter(
+    "db_lock_retries_total", "Write transactions retried after SQLite reported a lock."
+)
+
+
+def observe_upstream(upstream, method, seconds, status=None, timeout=False):
+    UPSTREAM_LATENCY.observe(seconds, upstream=upstream, method=method)
+    UPSTREAM_REQUESTS.inc(upstream=upstream, method=method, status=str(status or "error"))
+    if timeout:
+        UPSTREAM_TIMEOUTS.inc(upstream=upstream, method=method)
+
+
+# ========= プロセス間の集計 =========
+
+def snapshot():
+    with _lock:
+        return {
+            name: {
+                "kind": metric.kind,
+                "help": metric.help,
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": {
+                    key: list(value) if isinstance(value, list) else value
+                    for key, value in metric.samples.items()
+                },
+            }
+            for name, metric in _registry.items()
+        }
+
+
+def _metrics_dir():
+    path = getattr(settings, "METRICS_DIR", None)
+    return Path(path) if path else None
+
+
+def flush():
+    global _last_flush
+    directory = _metrics_dir()
+    _last_flush = time.monotonic()
+    if directory is None:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"metrics-{os.getpid()}.json"
+    tmp = directory / f".metrics-{os.getpid()}-{threading.get_ident()}.tmp"
+    tmp.write_text(json.dumps(snapshot()), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def maybe_flush():
+    if _metrics_dir() is None:
+        return
+    if time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL:
+        try:
+            flush()
+        except OSError:
+            pass
+
+
+atexit.register(lambda: _metrics_dir() and flush())
+
+
+def _merge(total, snap):
+    for name, metric in snap.items():
+        merged = total.setdefault(name, {**metric, "samples": {}})
+        for key, value in metric["samples"].items():
+            current = merged["samples"].get(key)
+            if current is None:
+                merged["samples"][key] = value
+            elif isinstance(value, list):
+                merged["samples"][key] = [a + b for a, b in zip(current, value)]
+            else:
+                merged["samples"][key] = current + value
+
+
+def collect():
+    """全プロセス分を足し合わせたスナップショット。"""
+    directory = _metrics_dir()
+    if directory is None:
+        return snapshot()
+
+    flush()
+    total = {}
+    for path in sorted(directory.glob("metrics-*.json")):
+        try:
+            _merge(total, json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue  # 書き込み途中など
+    return total
+
+
+# ========= テキスト形式 =========
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(collected=None):
+    collected = collect() if collected is None else collected
+    lines = []
+    for name, metric in collected.items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        for key, value in metric["samples"].items():
+            pairs = json.loads(key)
+            if metric["kind"] == "counter":
+                lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                continue
+            cumulative = 0
+            for upper, count in zip(list(metric["buckets"]) + [float("inf")], value[:-2]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(pairs, [('le', _number(upper))])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(pairs)} {_number(value[-2])}")
+            lines.append(f"{name}_count{_labels(pairs)} {value[-1]}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,192 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics, routers, timing
+from .eventlog import log_event
+from .streaming import async_chunks
+
+
+# ========= リクエストの処理時間（Server-Timing / メトリクス / 遅いリクエストのログ） =========
+
+class QueryTimer:
+    """execute_wrapper として全 DB 接続に差し込み、クエリ数と合計時間を RequestTiming に足す。"""
+
+    def __init__(self, request_timing):
+        self.timing = request_timing
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.timing.db_seconds += time.perf_counter() - started
+            self.timing.db_count += 1
+
+    def install(self, stack):
+        for connection in connections.all(initialized_only=False):
+            stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "unresolved"
+
+
+class RequestTimingMiddleware:
+    """
+    リクエスト全体・ORM・テンプレート描画・外部 API の時間を計る。
+    - SERVER_TIMING が有効なら Server-Timing ヘッダを付ける（ブラウザの devtools で見える）
+    - SLOW_REQUEST_MS を超えたリクエストは警告ログに出す
+    - ORM の合計時間は view_db_query_duration_seconds に記録する
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        request_timing, token = timing.start()
+        try:
+            with ExitStack() as stack:
+                QueryTimer(request_timing).install(stack)
+                response = self.get_response(request)
+        finally:
+            timing.finish(token)
+        return self.finish(request, response, request_timing)
+
+    async def __acall__(self, request):
+        request_timing, token = timing.start()
+        try:
+            with ExitStack() as stack:
+                QueryTimer(request_timing).install(stack)
+                response = await self.get_response(request)
+        finally:
+            timing.finish(token)
+        return self.finish(request, response, request_timing)
+
+    def finish(self, request, response, request_timing):
+        total = request_timing.total_seconds
+        view = _view_name(request)
+        metrics.VIEW_DB_TIME.observe(request_timing.db_seconds, view=view)
+
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = request_timing.server_timing(total)
+
+        if total * 1000 >= settings.SLOW_REQUEST_MS:
+            log_event(
+                "slow_request",
+                level=logging.WARNING,
+                method=request.method,
+                path=request.path,
+                view=view,
+                status=response.status_code,
+                total_ms=round(total * 1000, 1),
+                db_ms=round(request_timing.db_seconds * 1000, 1),
+                db_queries=request_timing.db_count,
+                template_ms=round(request_timing.template_seconds * 1000, 1),
+                http_ms=round(request_timing.http_seconds * 1000, 1),
+                http_calls=request_timing.http_count,
+            )
+        return response
+
+
+# ========= 自分の書き込みをレプリカの遅れから守る =========
+
+class PrimaryPinMiddleware:
+    """
+    書き込みがあったレスポンスに Cookie を付け、REPLICA_PIN_SECONDS の間、
+    そのブラウザからのリクエストの読み込みを default（primary）に固定する。
+    レプリカを設定していなければ何もしない。
+    """
+
+    COOKIE_NAME = "pin_primary"
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        wrote, tokens = routers.begin_request(self.COOKIE_NAME in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.end_request(tokens)
+        return self.finish(response, wrote)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        wrote, tokens = routers.begin_request(self.COOKIE_NAME in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.end_request(tokens)
+        return self.finish(response, wrote)
+
+    def finish(self, response, wrote):
+        if wrote:
+            response.set_cookie(
+                self.COOKIE_NAME, "1",
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite="Lax",
+            )
+        return response
+
+
+# ========= 静的ファイル（WhiteNoise の async 対応版） =========
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware は同期専用で、ASGI ではチェーンごとスレッドに載せ替えられる
+    （async ビューが外部 API を待つ間もスレッドを 1 本ふさぐ）。
+    静的ファイル以外はそのまま await で渡し、静的ファイルは開くところだけスレッドで行う。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # 開発時（DEBUG）はリクエストごとにディスクを探す
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+
+        response = await sync_to_async(self.serve)(static_file, request)
+        # 本文も 1 チャンクずつ読む（同期のままだと Django が全部読んでから送る）
+        response.streaming_content = async_chunks(response.streaming_content)
+        return response
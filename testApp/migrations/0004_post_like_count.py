@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 06:57
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_like_count(apps, schema_editor):
+    Post = apps.get_model("testapp", "Post")
+    Like = Post.likes.through
+    counts = (
+        Like.objects.filter(post_id=OuterRef("pk"))
+        .order_by()
+        .values("post_id")
+        .annotate(n=Count("*"))
+        .values("n")
+    )
+    Post.objects.update(like_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("testapp", "0003_post_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_like_count, migrations.RunPython.noop),
+    ]
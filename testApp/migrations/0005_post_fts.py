@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-18 07:10
+
+import sqlite3
+
+from django.db import migrations
+
+# FTS5 の仮想テーブルは SQLite 専用。他の DB では何もしない（icontains で検索する）。
+# trigram トークナイザは SQLite 3.34 以降にしかないので、それより古い場合も作らない。
+
+
+def _fts_supported(schema_editor):
+    return (
+        schema_editor.connection.vendor == "sqlite"
+        and sqlite3.sqlite_version_info >= (3, 34, 0)
+    )
+
+
+def create_fts_table(apps, schema_editor):
+    if not _fts_supported(schema_editor):
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS testapp_post_fts "
+        "USING fts5(content, username, tokenize='trigram')"
+    )
+    schema_editor.execute(
+        "INSERT INTO testapp_post_fts(rowid, content, username) "
+        "SELECT p.id, p.content, u.username FROM testapp_post p "
+        "JOIN auth_user u ON u.id = p.author_id"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if not _fts_supported(schema_editor):
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS testapp_post_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("testapp", "0004_post_like_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("testapp", "0005_post_fts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-18 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("testapp", "0006_post_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TodoistSyncState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sync_token", models.CharField(default="*", max_length=255)),
+                ("synced_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TodoistTask",
+            fields=[
+                (
+                    "id",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("content", models.TextField()),
+                ("is_completed", models.BooleanField(default=False)),
+                ("order", models.IntegerField(default=0)),
+                ("synced_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["is_completed", "order"], name="todoist_open_order_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("testapp", "0007_todoist_mirror"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="todoistsyncstate",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -1,6 +1,62 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Exists, F, OuterRef
 from django.contrib.auth.models import User  # 这一行保留
 
+from . import page_cache
+from .db import retry_on_locked
+
+
+class PostQuerySet(models.QuerySet):
+
+    def for_cards(self):
+        """一覧・詳細のテンプレートが使う列だけを、投稿者と一緒に 1 クエリで取る。"""
+        return self.select_related("author").only(
+            "content", "created_at", "like_count", "version", "author__username"
+        )
+
+    def with_viewer_liked(self, user):
+        """
+        ログイン中なら、そのユーザーがいいね済みかを viewer_liked に付ける。
+        EXISTS の相関サブクエリなので、ページ全体でも 1 クエリのまま（投稿ごとのクエリなし）。
+        """
+        if not user.is_authenticated:
+            return self
+        liked = Post.likes.through.objects.filter(post_id=OuterRef("pk"), user_id=user.pk)
+        return self.annotate(viewer_liked=Exists(liked))
+
+    @retry_on_locked
+    def toggle_like(self, post_id, user_id):
+        """
+        いいねを付け外しして (liked, like_count) を返す。
+
+        中間テーブルへの DELETE / INSERT と like_count の F() 更新を
+        1 トランザクションで行うので、同時クリックでも件数がずれない。
+        SQLite のロック待ちで失敗したときは丸ごとやり直す。
+        """
+        Like = Post.likes.through
+        with transaction.atomic():
+            removed, _ = Like.objects.filter(post_id=post_id, user_id=user_id).delete()
+            if removed:
+                liked, delta = False, -1
+            else:
+                try:
+                    with transaction.atomic():
+                        Like.objects.create(post_id=post_id, user_id=user_id)
+                    liked, delta = True, 1
+                except IntegrityError:
+                    # 同じユーザーの同時リクエストが先に INSERT 済み
+                    liked, delta = True, 0
+
+            if delta:
+                self.filter(pk=post_id).update(
+                    like_count=F("like_count") + delta, version=F("version") + 1
+                )
+            like_count = self.filter(pk=post_id).values_list("like_count", flat=True).get()
+            if delta:
+                page_cache.invalidate()
+        return liked, like_count
+
+
 class Post(models.Model):
     # 投稿内容
     content = models.TextField()
@@ -18,9 +74,147 @@ class Post(models.Model):
         blank=True
     )
 
+    # いいね数（likes の件数を非正規化して保持。COUNT(*) を避けるため）
+    like_count = models.PositiveIntegerField(default=0)
+
+    # 表示内容が変わるたびに上がる番号（描画済みカードのキャッシュキーに使う）
+    version = models.PositiveIntegerField(default=1)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # タイムラインのカーソルページング用（新しい順）
+            models.Index(fields=["-created_at", "-id"], name="post_created_id_idx"),
+        ]
+
     def __str__(self):
         return f"{self.author.username}: {self.content[:20]}"
 
+    def save(self, *args, **kwargs):
+        bump = not self._state.adding
+        if bump:
+            # 手元の値 + 1 だと、読み込み後にいいねで上がった番号と重なる（古いカードが残る）。
+            # DB 上の値から上げて、保存のたびに必ず新しい番号にする
+            self.version = F("version") + 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None:
+                # like_count は toggle_like が F() で更新する。読み込んだ時点の値で
+                # 上書きすると、その間に付いたいいねが消えるので書き込まない
+                update_fields = [
+                    f.name
+                    for f in self._meta.concrete_fields
+                    if not f.primary_key and f.name != "like_count"
+                ]
+            # update_fields を指定した保存でも version は必ず書き込む
+            kwargs["update_fields"] = {*update_fields, "version"}
+        super().save(*args, **kwargs)
+        if bump:
+            self.refresh_from_db(fields=["version"])
+
     def total_likes(self):
-        return self.likes.count()
+        return self.like_count
+
+
+
+class TodoistTask(models.Model):
+    """Todoist のタスクのローカルミラー（増分同期で更新する）。"""
+
+    # Todoist 側のタスク ID
+    id = models.CharField(primary_key=True, max_length=64)
+
+    content = models.TextField()
+
+    is_completed = models.BooleanField(default=False)
+
+    # Todoist 上の並び順（child_order）
+    order = models.IntegerField(default=0)
+
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # 未完了タスクの一覧用
+            models.Index(fields=["is_completed", "order"], name="todoist_open_order_idx"),
+        ]
+
+    def __str__(self):
+        return self.content[:20]
+
+
+class TodoistSyncState(models.Model):
+    """増分同期の状態。1 行だけ使う（pk=1）。"""
+
+    # "*" は全件同期
+    sync_token = models.CharField(max_length=255, default="*")
+
+    synced_at = models.DateTimeField(null=True, blank=True)
+
+    # ミラーの中身が変わるたびに上がる番号（/api/todoist/tasks/ の ETag に使う）
+    version = models.PositiveIntegerField(default=1)
+
+    @classmethod
+    def load(cls):
+        state, _ = cls.objects.get_or_create(pk=1)
+        return state
+
+
+class PomodoroSession(models.Model):
+    """完了した作業・休憩の区間。追記のみで、集計は PomodoroDailyStat から読む。"""
+
+    KIND_WORK = "work"
+    KIND_BREAK = "break"
+    KIND_CHOICES = [(KIND_WORK, "作業"), (KIND_BREAK, "休憩")]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="pomodoro_sessions")
+
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES)
+
+    started_at = models.DateTimeField()
+
+    ended_at = models.DateTimeField()
+
+    # 実際に数えた秒数（一時停止していた時間は含まない）
+    seconds = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            # クライアントが同じバッチを送り直しても二重に数えない
+            models.UniqueConstraint(
+                fields=["user", "started_at", "kind"], name="pomodoro_session_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.kind} {self.started_at:%Y-%m-%d %H:%M}"
+
+
+class PomodoroDailyStat(models.Model):
+    """ユーザー × 日（TIME_ZONE の日付）ごとの集計。セッションを記録するたびに加算する。"""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="pomodoro_stats")
+
+    day = models.DateField()
+
+    work_seconds = models.PositiveIntegerField(default=0)
+
+    break_seconds = models.PositiveIntegerField(default=0)
+
+    # 完了した作業区間（ポモドーロ）の数
+    work_sessions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "day"], name="pomodoro_stat_user_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.day}"
+
+    @property
+    def focus_minutes(self):
+        return self.work_seconds // 60
 
+    @property
+    def break_minutes(self):
+        return self.break_seconds // 60
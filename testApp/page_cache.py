@@ -0,0 +1,108 @@
+import hashlib
+import time
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from . import metrics
+
+
+# ========= 匿名ユーザー向けのページキャッシュ =========
+# セッション Cookie を持たない（＝ログインしていない）GET のレスポンスを丸ごとキャッシュする。
+# キーに世代番号を含め、投稿の作成・編集・削除・いいねで世代を上げると全ページが一度に無効になる。
+# ヒットしたときはセッションも読まないので DB に触れない。
+
+# 世代番号と最終更新時刻は、条件付き GET（ETag / Last-Modified）の検証子にも使う。
+
+GENERATION_KEY = "page_cache:generation"
+LAST_CHANGE_KEY = "page_cache:last_change"
+
+
+def generation():
+    gen = cache.get(GENERATION_KEY)
+    if gen is None:
+        # キャッシュから消えていたら、古いページの世代と重ならない値から始める
+        if cache.add(GENERATION_KEY, time.time_ns() // 1000, None):
+            cache.set(LAST_CHANGE_KEY, time.time(), None)
+        gen = cache.get(GENERATION_KEY)
+    return gen
+
+
+def last_change():
+    """最後に世代が上がった時刻（UTC の datetime）。分からなければ None。"""
+    ts = cache.get(LAST_CHANGE_KEY)
+    return datetime.fromtimestamp(ts, tz=dt_timezone.utc) if ts is not None else None
+
+
+def _bump():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        generation()
+    cache.set(LAST_CHANGE_KEY, time.time(), None)
+
+
+def invalidate():
+    """
+    世代を上げる。トランザクション中ならコミットの後で上げる
+    （先に上げると、コミット前の古い内容が新しい世代で保存されうる）。
+    """
+    transaction.on_commit(_bump)
+
+
+def is_cacheable(request):
+    return (
+        request.method in ("GET", "HEAD")
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def _page_key(view_name, request, params, gen):
+    query = urlencode(sorted((p, request.GET[p]) for p in params if p in request.GET))
+    digest = hashlib.md5(query.encode(), usedforsecurity=False).hexdigest()
+    return f"page:{view_name}:{gen}:{digest}"
+
+
+def cache_anonymous_page(params=()):
+    """
+    ビューのデコレーター。匿名リクエストのレスポンスを GET パラメーター params ごとに
+    PAGE_CACHE_TIMEOUT 秒キャッシュする。ログイン中のユーザーには効かない。
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not settings.PAGE_CACHE_TIMEOUT or not is_cacheable(request):
+                return view(request, *args, **kwargs)
+
+            key = _page_key(view.__name__, request, params, generation())
+            cached = cache.get(key)
+            if cached is not None:
+                metrics.PAGE_CACHE.inc(result="hit")
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response["X-Page-Cache"] = "hit"
+                patch_vary_headers(response, ("Cookie",))
+                return response
+
+            metrics.PAGE_CACHE.inc(result="miss")
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                cache.set(
+                    key, (response.content, response["Content-Type"]), settings.PAGE_CACHE_TIMEOUT
+                )
+                response["X-Page-Cache"] = "miss"
+            return response
+
+        return wrapper
+
+    return decorator
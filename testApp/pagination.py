@@ -0,0 +1,65 @@
+import base64
+from datetime import datetime, timezone
+
+from django.db.models import Q
+
+
+# ========= カーソル（キーセット）ページング =========
+# (created_at, id) の組を次ページの起点として使う。
+# OFFSET を使わないので、どれだけ深くスクロールしても 1 ページのコストは一定。
+
+def encode_cursor(post):
+    """post はモデルインスタンスか values() の dict（created_at と id を含む）。"""
+    if isinstance(post, dict):
+        created_at, pk = post["created_at"], post["id"]
+    else:
+        created_at, pk = post.created_at, post.pk
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """不正なカーソルは None を返す（先頭ページ扱い）。"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_at, pk = raw.rsplit("|", 1)
+        created_at, pk = datetime.fromisoformat(created_at), int(pk)
+        # encode_cursor は必ずタイムゾーン付きで書く。naive なものは作り物として扱う
+        if created_at.tzinfo is None or not 0 < pk < 2**63:
+            return None
+        # ここで UTC にしておく（範囲外の日時はクエリでなくここで OverflowError になる）
+        return created_at.astimezone(timezone.utc), pk
+    except (ValueError, UnicodeError, OverflowError):
+        return None
+
+
+def after_cursor(queryset, cursor):
+    """cursor より後ろ（古い側）を新しい順に並べた QuerySet。"""
+    queryset = queryset.order_by("-created_at", "-id")
+
+    position = decode_cursor(cursor)
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+    return queryset
+
+
+def paginate_keyset(queryset, cursor, page_size):
+    """
+    新しい順に page_size 件を返す。戻り値は (items, next_cursor)。
+    次ページがなければ next_cursor は None。
+    """
+    queryset = after_cursor(queryset, cursor)
+
+    # 1 件多く取って「次があるか」を判定する（COUNT は使わない）
+    items = list(queryset[: page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor(items[-1])
+    return items, next_cursor
@@ -0,0 +1,203 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .db import retry_on_locked
+from .models import PomodoroDailyStat, PomodoroSession
+
+
+# ========= ポモドーロ：セッションの記録と日別集計 =========
+# 完了した作業・休憩の区間をクライアントがまとめて送り、PomodoroSession に
+# bulk_create で追記する。同じトランザクションで PomodoroDailyStat に差分を
+# F() で足し込むので、統計ページは日ごとの集計行を読むだけ（ログ全体は走査しない）。
+# 日付は開始時刻の TIME_ZONE での日付（日をまたぐ区間も開始日に数える）。
+
+KINDS = {kind for kind, _ in PomodoroSession.KIND_CHOICES}
+
+# 区間の長さと、実際に数えた秒数のずれの許容（クライアントの時計・タイマーの誤差）
+SECONDS_SLACK = 5
+
+# タイマーで選べる最長の区間（分）。これより長い区間は受け付けない
+MAX_MINUTES = 180
+MAX_SESSION_SECONDS = MAX_MINUTES * 60 + SECONDS_SLACK
+
+
+def _parse_time(value, name):
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValueError(f"{name} must be an ISO 8601 datetime")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _parse_session(item, user):
+    if not isinstance(item, dict) or item.get("kind") not in KINDS:
+        raise ValueError("kind must be 'work' or 'break'")
+    started_at = _parse_time(item.get("startedAt"), "startedAt")
+    ended_at = _parse_time(item.get("endedAt"), "endedAt")
+    seconds = item.get("seconds")
+    if not isinstance(seconds, int) or isinstance(seconds, bool) or seconds <= 0:
+        raise ValueError("seconds must be a positive integer")
+    if ended_at <= started_at or seconds > (ended_at - started_at).total_seconds() + SECONDS_SLACK:
+        raise ValueError("seconds must fit between startedAt and endedAt")
+    if (ended_at - started_at).total_seconds() > MAX_SESSION_SECONDS:
+        raise ValueError(f"sessions must be at most {MAX_MINUTES} minutes long")
+    return PomodoroSession(
+        user=user,
+        kind=item["kind"],
+        started_at=started_at,
+        ended_at=ended_at,
+        seconds=seconds,
+    )
+
+
+def parse_sessions(items, user):
+    """
+    リクエストの sessions を 1 件ずつ検証する。戻り値は ({位置: PomodoroSession}, 不正だったもの)。
+    不正なものは [{"index": 位置, "error": 理由}] で返し、残りは記録できるようにする
+    （1 件のせいでバッチ全体を捨てさせない）。リスト自体が不正なら ValueError。
+    """
+    if not isinstance(items, list) or not items:
+        raise ValueError("sessions must be a non-empty list")
+    if len(items) > settings.POMODORO_BATCH_MAX_SESSIONS:
+        raise ValueError(f"too many sessions (max {settings.POMODORO_BATCH_MAX_SESSIONS})")
+
+    sessions = {}
+    rejected = []
+    for index, item in enumerate(items):
+        try:
+            sessions[index] = _parse_session(item, user)
+        except ValueError as e:
+            rejected.append({"index": index, "error": str(e)})
+    return sessions, rejected
+
+
+def _daily_totals(sessions):
+    """{day: [work_seconds, break_seconds, work_sessions]}"""
+    totals = defaultdict(lambda: [0, 0, 0])
+    for session in sessions:
+        total = totals[timezone.localdate(session.started_at)]
+        if session.kind == PomodoroSession.KIND_WORK:
+            total[0] += session.seconds
+            total[2] += 1
+        else:
+            total[1] += session.seconds
+    return totals
+
+
+def _overlaps(a_start, a_end, b_start, b_end):
+    # 前の区間の終わりと次の区間の始まりが少し重なるのは、時計の誤差として許す
+    slack = timedelta(seconds=SECONDS_SLACK)
+    return a_start < b_end - slack and b_start < a_end - slack
+
+
+def _fresh_sessions(user, sessions):
+    """
+    (まだ記録されていないセッション, 他の区間と重なるセッション)。
+    送り直し（同じ開始時刻・種類）はどちらにも入れない。バッチ内の重複も 1 つにする。
+    重なる区間を記録すると、日の合計が実際の経過時間を超えてしまう。
+    """
+    if not sessions:
+        return [], []
+    overlapping_range = Q()
+    for session in sessions:
+        overlapping_range |= Q(started_at__lt=session.ended_at, ended_at__gt=session.started_at)
+    recorded = list(
+        PomodoroSession.objects.filter(overlapping_range, user=user).values_list(
+            "started_at", "ended_at", "kind"
+        )
+    )
+    existing = {(started_at, kind) for started_at, _, kind in recorded}
+    intervals = [(started_at, ended_at) for started_at, ended_at, _ in recorded]
+
+    seen = set()
+    fresh = []
+    overlapping = []
+    for session in sorted(sessions, key=lambda s: s.started_at):
+        key = (session.started_at, session.kind)
+        if key in existing or key in seen:
+            continue
+        seen.add(key)
+        if any(_overlaps(session.started_at, session.ended_at, *i) for i in intervals):
+            overlapping.append(session)
+            continue
+        intervals.append((session.started_at, session.ended_at))
+        fresh.append(session)
+    return fresh, overlapping
+
+
+@retry_on_locked
+def record_sessions(user, sessions):
+    """
+    セッションを追記し、日別集計に足し込む。戻り値は (記録した件数, 重なっていて記録しなかったセッション)。
+    送り直し（同じ user・開始時刻・種類）は飛ばすので、集計も二重にならない。
+    """
+    with transaction.atomic():
+        fresh, overlapping = _fresh_sessions(user, sessions)
+        if not fresh:
+            return 0, overlapping
+
+        try:
+            with transaction.atomic():
+                PomodoroSession.objects.bulk_create(fresh)
+        except IntegrityError:
+            # 同じバッチの送り直しが同時に入った。向こうが記録した分を除いて入れ直す
+            fresh, overlapping = _fresh_sessions(user, sessions)
+            if not fresh:
+                return 0, overlapping
+            PomodoroSession.objects.bulk_create(fresh)
+
+        totals = _daily_totals(fresh)
+        # 集計行がなければ作ってから、差分を足す（同時に記録されてもずれない）
+        PomodoroDailyStat.objects.bulk_create(
+            [PomodoroDailyStat(user=user, day=day) for day in totals], ignore_conflicts=True
+        )
+        for day, (work_seconds, break_seconds, work_sessions) in totals.items():
+            PomodoroDailyStat.objects.filter(user=user, day=day).update(
+                work_seconds=F("work_seconds") + work_seconds,
+                break_seconds=F("break_seconds") + break_seconds,
+                work_sessions=F("work_sessions") + work_sessions,
+            )
+    return len(fresh), overlapping
+
+
+def daily_stats(user, days):
+    """今日までの days 日分の集計（古い順）。記録のない日は 0 で埋める。"""
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    rows = {
+        stat.day: stat
+        for stat in PomodoroDailyStat.objects.filter(user=user, day__gte=start, day__lte=today)
+    }
+    return [
+        rows.get(day) or PomodoroDailyStat(user=user, day=day)
+        for day in (start + timedelta(days=i) for i in range(days))
+    ]
+
+
+@transaction.atomic
+def rebuild_daily_stats():
+    """集計をセッションのログから作り直す（ずれたとき用。全件を読むので重い）。作った行数を返す。"""
+    PomodoroDailyStat.objects.all().delete()
+    work = Q(kind=PomodoroSession.KIND_WORK)
+    rows = (
+        PomodoroSession.objects.annotate(day=TruncDate("started_at"))
+        .values("user_id", "day")
+        .annotate(
+            work_seconds=Sum("seconds", filter=work, default=0),
+            break_seconds=Sum("seconds", filter=~work, default=0),
+            work_sessions=Count("id", filter=work),
+        )
+        .order_by()
+    )
+    stats = PomodoroDailyStat.objects.bulk_create(
+        PomodoroDailyStat(**row) for row in rows.iterator()
+    )
+    return len(stats)
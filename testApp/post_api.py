@@ -0,0 +1,106 @@
+import json
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Post
+from .pagination import after_cursor, paginate_keyset
+
+
+# ========= 投稿 API（/api/posts/） =========
+# タイムラインと同じ (created_at, id) のカーソルで新しい順に返す。
+# values() で必要な列だけを dict で読むので、モデルインスタンスは作らない。
+# ?format=ndjson のときはページングせず、iterator(chunk_size) で少しずつ読みながら
+# 1 行 1 投稿で流す（全件を一度にメモリへ載せない）。
+
+# 公開するフィールド名 -> values() に渡す列
+FIELDS = {
+    "id": "id",
+    "content": "content",
+    "created_at": "created_at",
+    "author": "author__username",
+    "like_count": "like_count",
+}
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+STREAM_CHUNK_SIZE = 500
+
+
+def parse_fields(value):
+    """?fields=id,content を検証してリストにする。未指定なら全部。不正なら ValueError。"""
+    if not value:
+        return list(FIELDS)
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(fields))
+
+
+def parse_limit(value):
+    try:
+        return min(max(int(value), 1), MAX_LIMIT)
+    except (TypeError, ValueError):
+        return DEFAULT_LIMIT
+
+
+def filter_since(queryset, params):
+    """
+    差分取得用のフィルター。
+    - since: ISO 8601 の日時。これより後に作られた投稿だけ
+    - since_id: この ID より大きい投稿だけ
+    """
+    since = params.get("since")
+    if since:
+        value = parse_datetime(since)
+        if value is None:
+            raise ValueError("since must be an ISO 8601 datetime")
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        queryset = queryset.filter(created_at__gt=value)
+
+    since_id = params.get("since_id")
+    if since_id:
+        try:
+            queryset = queryset.filter(id__gt=int(since_id))
+        except ValueError:
+            raise ValueError("since_id must be an integer") from None
+    return queryset
+
+
+def post_rows(params):
+    """リクエストのパラメーターから (行の QuerySet, fields) を作る。不正なら ValueError。"""
+    fields = parse_fields(params.get("fields"))
+    queryset = filter_since(Post.objects.all(), params)
+    # カーソルを作るので id と created_at は常に読む
+    columns = {FIELDS[f] for f in fields} | {"id", "created_at"}
+    return queryset.values(*columns), fields
+
+
+def serialize(row, fields):
+    post = {f: row[FIELDS[f]] for f in fields}
+    if "created_at" in post:
+        # DjangoJSONEncoder はミリ秒に丸めるので、since にそのまま渡せるよう全桁で出す
+        post["created_at"] = post["created_at"].isoformat()
+    return post
+
+
+def page(rows, fields, cursor, limit):
+    """1 ページ分。戻り値は (posts, next_cursor)。"""
+    items, next_cursor = paginate_keyset(rows, cursor, limit)
+    return [serialize(row, fields) for row in items], next_cursor
+
+
+def ndjson_lines(rows, fields, cursor=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    cursor 以降を全部、NDJSON で少しずつ生成する。
+    1 行ずつ yield すると書き込みが細かくなりすぎるので、chunk_size 行ずつまとめる。
+    """
+    buffer = []
+    for row in after_cursor(rows, cursor).iterator(chunk_size=chunk_size):
+        buffer.append(json.dumps(serialize(row, fields), ensure_ascii=False))
+        if len(buffer) >= chunk_size:
+            yield "\n".join(buffer) + "\n"
+            buffer = []
+    if buffer:
+        yield "\n".join(buffer) + "\n"
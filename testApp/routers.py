@@ -0,0 +1,56 @@
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import connections
+
+
+# ========= 読み書き分離のルーター =========
+# 読み込みは settings.DATABASE_REPLICAS のどれか、書き込みは default に送る。
+# 次のときは読み込みも default に送る（レプリカの遅れで自分の書き込みが見えなくなるのを防ぐ）:
+# - PrimaryPinMiddleware が「最近書き込んだ」と判断したリクエスト
+# - このリクエストの中で既に書き込んだあと
+# - default でトランザクション中（同じトランザクションの内容を読むため）
+
+_pinned = contextvars.ContextVar("primary_pinned", default=False)
+_wrote = contextvars.ContextVar("primary_wrote", default=None)
+
+
+def begin_request(pinned):
+    """
+    リクエストの開始時に呼ぶ。pinned なら最初から default を読む。
+    戻り値の wrote は、このリクエストで書き込みがあると [True] になる。
+    """
+    wrote = []
+    return wrote, (_pinned.set(pinned), _wrote.set(wrote))
+
+
+def end_request(tokens):
+    pinned_token, wrote_token = tokens
+    _pinned.reset(pinned_token)
+    _wrote.reset(wrote_token)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or _pinned.get() or connections["default"].in_atomic_block:
+            return "default"
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        wrote = _wrote.get()
+        if wrote is not None and not wrote:
+            wrote.append(True)
+        # 以降の読み込みは default から（書いたばかりの行がレプリカにまだ無いかもしれない）
+        _pinned.set(True)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # レプリカは default の写しなので、どこから読んだオブジェクト同士でも関連付けてよい
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # スキーマはレプリケーション（ローカルならファイルのコピー）で届く
+        return db not in settings.DATABASE_REPLICAS
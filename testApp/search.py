@@ -0,0 +1,183 @@
+import sqlite3
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+
+# ========= 投稿検索 =========
+# バックエンドは settings.SEARCH_BACKEND で差し替え可能。
+# 未指定なら SQLite → FTS5、それ以外の DB → icontains にフォールバックする。
+# FTS5 の trigram トークナイザは SQLite 3.34 以降。それより古ければ icontains を使う
+# （0005 のマイグレーションも同じ条件でテーブルを作らない）。
+
+FTS_TABLE = "testapp_post_fts"
+FTS_MIN_SQLITE_VERSION = (3, 34, 0)
+
+
+def _terms(q):
+    return [t for t in (q or "").split() if t]
+
+
+class IcontainsSearchBackend:
+    """インデックスを持たない素朴な実装（全件スキャン）。"""
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def reindex_author(self, user):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def _queryset(self, q):
+        qs = Post.objects.all()
+        for term in _terms(q):
+            qs = qs.filter(Q(content__icontains=term) | Q(author__username__icontains=term))
+        return qs
+
+    def search(self, q, offset, limit):
+        qs = self._queryset(q).order_by("-created_at", "-id")
+        return list(qs.values_list("id", flat=True)[offset : offset + limit])
+
+    def count(self, q, cap):
+        return self._queryset(q)[:cap].count()
+
+
+class SqliteFTSSearchBackend:
+    """
+    SQLite FTS5（trigram トークナイザ）による全文検索。
+
+    trigram なので日本語の部分一致にも使えるが、3 文字未満の語は
+    インデックスで引けないため、その語だけ LIKE で絞り込む。
+    3 文字以上の語が 1 つもなければ icontains に任せる。
+
+    ORDER BY rank は一致した全行に点数を付けてから並べるので、よくある語
+    （100 万件中の数十万件に一致）では 1 秒を超える。一致が SEARCH_RANK_MAX_MATCHES 件を
+    超える語は、ランキングをやめて新しい順（rowid 降順、インデックス順なので LIMIT で止まる）にする。
+    """
+
+    MIN_TERM_LENGTH = 3
+
+    def __init__(self):
+        self.fallback = IcontainsSearchBackend()
+
+    def _where(self, q):
+        """(WHERE 句, パラメーター)。インデックスで引ける語がなければ None。"""
+        terms = _terms(q)
+        long_terms = [t for t in terms if len(t) >= self.MIN_TERM_LENGTH]
+        if not long_terms:
+            return None
+        # 各語をフレーズとして引用し、FTS5 の演算子として解釈させない
+        match = " ".join('"%s"' % t.replace('"', '""') for t in long_terms)
+        sql = [f"{FTS_TABLE} MATCH %s"]
+        params = [match]
+        for term in terms:
+            if len(term) < self.MIN_TERM_LENGTH:
+                like = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                sql.append("(content LIKE %s ESCAPE '\\' OR username LIKE %s ESCAPE '\\')")
+                params += [like, like]
+        return " AND ".join(sql), params
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT OR REPLACE INTO {FTS_TABLE}(rowid, content, username) VALUES (%s, %s, %s)",
+                [post.pk, post.content, post.author.username],
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id])
+
+    def reindex_author(self, user):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {FTS_TABLE} SET username = %s WHERE rowid IN "
+                f"(SELECT id FROM {Post._meta.db_table} WHERE author_id = %s)",
+                [user.username, user.pk],
+            )
+
+    def rebuild(self):
+        # 入れ替えの途中（空のインデックス）を同時に走る検索から見せない
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            # 一括投入の間は自動マージを止める（セグメント数は crisismerge で抑えられる）。
+            # 止めないと 100 万件で倍以上かかる。終わったら既定値（4）に戻す
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('automerge', 0)")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}(rowid, content, username) "
+                f"SELECT p.id, p.content, u.username FROM {Post._meta.db_table} p "
+                f"JOIN {User._meta.db_table} u ON u.id = p.author_id"
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('automerge', 4)")
+            cursor.execute(f"SELECT count(*) FROM {FTS_TABLE}")
+            return cursor.fetchone()[0]
+
+    def search(self, q, offset, limit):
+        where = self._where(q)
+        if where is None:
+            return self.fallback.search(q, offset, limit)
+        sql, params = where
+        cap = settings.SEARCH_RANK_MAX_MATCHES
+        order = "rank" if self._count(sql, params, cap + 1) <= cap else "rowid DESC"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {sql} ORDER BY {order} LIMIT %s OFFSET %s",
+                [*params, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def count(self, q, cap):
+        where = self._where(q)
+        if where is None:
+            return self.fallback.count(q, cap)
+        return self._count(*where, cap)
+
+    def _count(self, sql, params, cap):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM (SELECT 1 FROM {FTS_TABLE} WHERE {sql} LIMIT %s)",
+                [*params, cap],
+            )
+            return cursor.fetchone()[0]
+
+
+_backend = None
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, "SEARCH_BACKEND", None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == "sqlite" and sqlite3.sqlite_version_info >= FTS_MIN_SQLITE_VERSION:
+            _backend = SqliteFTSSearchBackend()
+        else:
+            _backend = IcontainsSearchBackend()
+    return _backend
+
+
+def search_posts(q, page, page_size):
+    """
+    ランキング順に page ページ目の投稿 ID を返す。戻り値は (ids, has_next)。
+    """
+    backend = get_search_backend()
+    ids = backend.search(q, (page - 1) * page_size, page_size + 1)
+    return ids[:page_size], len(ids) > page_size
+
+
+def count_results(q):
+    """件数は SEARCH_RESULT_CAP で打ち切る。戻り値は (件数, 打ち切ったか)。"""
+    cap = settings.SEARCH_RESULT_CAP
+    n = get_search_backend().count(q, cap + 1)
+    return min(n, cap), n > cap
@@ -0,0 +1,177 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Post
+from .search import get_search_backend
+
+
+# ========= ダミーデータの投入（ベンチマーク・動作確認用） =========
+# 同じ seed なら同じデータになる。100 万件単位を想定しているので:
+# - 投稿といいねはモデルを作らず executemany で batch_size 件ずつ入れる
+#   （id はこちらで振るので RETURNING 不要。最後にシーケンスを合わせる）
+# - 投入中は SQLite の同期書き込み・外部キー検査・二次インデックスを止める
+# - シグナルを通らないので like_count はここで数え、検索インデックスは最後に作り直す
+
+WORDS = [
+    "ポモドーロ", "集中", "休憩", "勉強", "読書", "コーヒー", "雨の音", "散歩",
+    "pomodoro", "focus", "rain", "coffee", "deadline", "review", "deploy", "music",
+]
+
+USERNAME_PREFIX = "seed_user_"
+BATCH_SIZE = 10000
+
+
+CONTENT_POOL_SIZE = 10000
+
+
+def post_content(rng):
+    return " ".join(rng.choices(WORDS, k=rng.randint(3, 12)))
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+@contextmanager
+def bulk_load_pragmas():
+    """SQLite のとき、投入の間だけ fsync を止め、ページキャッシュとソート用スレッドを増やす。"""
+    # synchronous はトランザクション中には変えられない（テストなど）ので、そのときは何もしない
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA synchronous")
+        synchronous = cursor.fetchone()[0]
+        cursor.execute("PRAGMA cache_size")
+        cache_size = cursor.fetchone()[0]
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA cache_size = -262144")  # 256MB
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        cursor.execute("PRAGMA threads = 4")  # CREATE INDEX のソートを並列に
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA synchronous = {int(synchronous)}")
+            cursor.execute(f"PRAGMA cache_size = {int(cache_size)}")
+            cursor.execute("PRAGMA temp_store = DEFAULT")
+            cursor.execute("PRAGMA threads = 0")
+
+
+@contextmanager
+def indexes_dropped(*models):
+    """
+    SQLite のとき、投入の間だけ二次インデックスを外し、最後に作り直す。
+    1 行ずつ B-tree を更新するより、入れ終わってから一度に作る方がずっと速い。
+    """
+    if connection.vendor != "sqlite":
+        yield
+        return
+    tables = [model._meta.db_table for model in models]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            f"AND tbl_name IN ({', '.join(['%s'] * len(tables))})",
+            tables,
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+    yield
+    with connection.cursor() as cursor:
+        for _, sql in indexes:
+            cursor.execute(sql)
+
+
+def _insert_sql(model, columns):
+    qn = connection.ops.quote_name
+    placeholders = ", ".join(["%s"] * len(columns))
+    return (
+        f"INSERT INTO {qn(model._meta.db_table)} ({', '.join(qn(c) for c in columns)}) "
+        f"VALUES ({placeholders})"
+    )
+
+
+def _seed_users(users, password):
+    hashed = make_password(password)
+    User.objects.bulk_create(
+        [User(username=f"{USERNAME_PREFIX}{i}", password=hashed) for i in range(users)],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return list(
+        User.objects.filter(username__startswith=USERNAME_PREFIX)
+        .order_by("id")
+        .values_list("id", flat=True)[:users]
+    )
+
+
+def _timestamps(posts, days):
+    """投稿日時（古い順）。DB に渡せる形にしておく。"""
+    now = timezone.now()
+    start = now - timedelta(days=days)
+    step = (now - start) / posts
+    if connection.vendor == "sqlite":
+        # adapt_datetimefield_value と同じ UTC の naive 文字列を直接作る（100 万回呼ぶと遅い）
+        start = start.astimezone(dt_timezone.utc).replace(tzinfo=None)
+        return (str(start + step * i) for i in range(posts))
+    adapt = connection.ops.adapt_datetimefield_value
+    return (adapt(start + step * i) for i in range(posts))
+
+
+def _generate(rng, user_ids, posts, likes, first_id, days):
+    """(投稿の行, いいねの行のリスト) を 1 件ずつ返す。created_at は id 順に新しくなる。"""
+    n_users = len(user_ids)
+    per_post, extra = divmod(min(likes, n_users * posts), posts)
+    ring = user_ids * 2  # いいねしたユーザーは ring 上の連続した区間から取る（重複なし）
+    random_ = rng.random
+    # 本文は 1 件ずつ作ると遅いので、作り置きから選んで番号を付ける
+    pool = [post_content(rng) for _ in range(min(posts, CONTENT_POOL_SIZE))]
+    n_pool = len(pool)
+
+    for i, created_at in enumerate(_timestamps(posts, days)):
+        post_id = first_id + i
+        # いいね数は平均 likes / posts 件、端数は先頭から 1 件ずつ
+        count = per_post + (i < extra)
+        offset = int(random_() * n_users)
+        author_id = user_ids[int(random_() * n_users)]
+        content = f"{pool[int(random_() * n_pool)]} #{post_id}"
+        row = (post_id, content, created_at, author_id, count, 1)
+        yield row, [(post_id, user_id) for user_id in ring[offset:offset + count]]
+
+
+def seed_database(users, posts, likes, seed=0, password="seed-pass", days=365, batch_size=BATCH_SIZE):
+    """ユーザー・投稿・いいねを投入して、投入したユーザーの id を返す。"""
+    rng = random.Random(seed)
+    post_sql = _insert_sql(Post, ["id", "content", "created_at", "author_id", "like_count", "version"])
+    Like = Post.likes.through
+    like_sql = _insert_sql(Like, ["post_id", "user_id"])
+
+    # 行は整合するように作るので、投入中は外部キーの検査も止める
+    with bulk_load_pragmas(), connection.constraint_checks_disabled(), transaction.atomic():
+        user_ids = _seed_users(users, password)
+        if user_ids and posts:
+            first_id = (Post.objects.order_by("-id").values_list("id", flat=True).first() or 0) + 1
+            rows = _generate(rng, user_ids, posts, likes, first_id, days)
+            with indexes_dropped(Post, Like), connection.cursor() as cursor:
+                for batch in _batches(rows, batch_size):
+                    cursor.executemany(post_sql, [post for post, _ in batch])
+                    cursor.executemany(like_sql, [like for _, post_likes in batch for like in post_likes])
+
+                # id を自前で振ったので、PostgreSQL などではシーケンスを進めておく
+                for sql in connection.ops.sequence_reset_sql(no_style(), [Post, Like]):
+                    cursor.execute(sql)
+
+        get_search_backend().rebuild()
+    return user_ids
@@ -0,0 +1,92 @@
+from django.contrib.auth.models import User
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import page_cache
+from .models import Post
+from .search import get_search_backend
+
+
+# ========= like_count の同期 =========
+# like_post は中間テーブルを直接操作するのでここは通らない。
+# post.likes.add() / user.liked_posts.remove() など ORM 経由の変更（管理画面・テスト等）用。
+
+def _recount_likes(post_ids):
+    Like = Post.likes.through
+    counts = (
+        Like.objects.filter(post_id=OuterRef("pk"))
+        .order_by()
+        .values("post_id")
+        .annotate(n=Count("*"))
+        .values("n")
+    )
+    Post.objects.filter(pk__in=post_ids).update(
+        like_count=Coalesce(Subquery(counts), 0), version=F("version") + 1
+    )
+
+
+@receiver(m2m_changed, sender=Post.likes.through)
+def sync_like_count(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # user.liked_posts.clear() は post_clear で対象 ID が分からないので先に控える
+        instance._cleared_post_ids = list(
+            sender.objects.filter(user_id=instance.pk).values_list("post_id", flat=True)
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if reverse and action == "post_clear":
+        post_ids = instance.__dict__.pop("_cleared_post_ids", [])
+    elif reverse:
+        post_ids = pk_set
+    else:
+        post_ids = [instance.pk]
+    if not post_ids:
+        return
+
+    _recount_likes(post_ids)
+    page_cache.invalidate()
+
+    if not reverse:
+        # 呼び出し元が持っているインスタンスも最新にしておく
+        instance.refresh_from_db(fields=["like_count"])
+
+
+# ========= 検索インデックス・ページキャッシュの同期 =========
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index_post(instance)
+        page_cache.invalidate()
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_search_backend().remove_post(instance.pk)
+    page_cache.invalidate()
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw=False, update_fields=None, **kwargs):
+    # ログイン時の last_login 更新などユーザー名を書かない保存は読まずに済ませる
+    if raw or instance._state.adding or (update_fields is not None and "username" not in update_fields):
+        return
+    instance._username_before_save = (
+        User.objects.filter(pk=instance.pk).values_list("username", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, **kwargs):
+    # パスワード変更など、ユーザー名が変わっていない保存は無視する
+    before = instance.__dict__.pop("_username_before_save", None)
+    if created or before is None or before == instance.username:
+        return
+    get_search_backend().reindex_author(instance)
+    # カードに投稿者名を表示しているので、描画キャッシュも無効にする
+    Post.objects.filter(author=instance).update(version=F("version") + 1)
+    page_cache.invalidate()
@@ -0,0 +1,36 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+
+# ========= 同期ジェネレーターのストリーミング（WSGI / ASGI 共通） =========
+# ASGI で StreamingHttpResponse に同期イテレーターを渡すと、Django は
+# sync_to_async(list) で全部読んでから送る（件数分メモリに載る）。
+# ASGI のときは 1 チャンクずつスレッドで取り出す async イテレーターに包む。
+# DB カーソルを使うので、ビューと同じスレッド（thread_sensitive）で進める。
+
+_DONE = object()
+
+
+async def async_chunks(chunks):
+    """同期イテレーターを 1 チャンクずつスレッドで進める async イテレーター。"""
+    iterator = iter(chunks)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await next_chunk(iterator, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        # 途中で切断されてもカーソルを閉じる
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=True)()
+
+
+def streaming_response(request, chunks, **kwargs):
+    """chunks（同期イテレーター）を少しずつ送る StreamingHttpResponse。"""
+    if isinstance(request, ASGIRequest):
+        chunks = async_chunks(chunks)
+    return StreamingHttpResponse(chunks, **kwargs)
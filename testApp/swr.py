@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+
+logger = logging.getLogger(__name__)
+
+
+# ========= stale-while-revalidate キャッシュ（プロセス内） =========
+# - ttl 以内：キャッシュをそのまま返す
+# - ttl 超〜ttl + stale_ttl：古い値を返しつつ、裏で 1 本だけ更新を走らせる
+# - それ以降 / 未取得：取得する。同じキーへの同時ミスは 1 回の取得にまとめる
+# - max_entries を超えたら、最後に使われたのが古いキーから捨てる（LRU）
+
+_MISS = object()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SWRCache:
+
+    def __init__(self, fetch, ttl, stale_ttl, wait_timeout=30, max_entries=None):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.wait_timeout = wait_timeout
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, fetched_at)（使われた順）
+        self._inflight = {}  # key -> _Call
+        self._ainflight = {}  # (loop, key) -> asyncio.Future
+        self._refreshing = set()
+
+    def get(self, key):
+        value = self._cached(key)
+        if value is _MISS:
+            value = self._load(key)
+        return value
+
+    async def aget(self, key, afetch):
+        """
+        async 版の get。ミスしたら afetch(key) を await する。
+        同じイベントループ内の同時ミスは 1 回の afetch にまとめる。
+        """
+        value = self._cached(key)
+        if value is not _MISS:
+            return value
+
+        loop = asyncio.get_running_loop()
+        inflight_key = (loop, key)
+        future = self._ainflight.get(inflight_key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # 待っている自分がキャンセルされた
+                # 先頭の取得がキャンセルされたので、取り直す
+                return await self.aget(key, afetch)
+
+        future = self._ainflight[inflight_key] = loop.create_future()
+        try:
+            value = await afetch(key)
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 待ち手がいなくても警告を出さない
+            raise
+        finally:
+            del self._ainflight[inflight_key]
+            if not future.done():
+                # 先頭がキャンセルされた（クライアントの切断など）。待ち手には取り直させる
+                future.cancel()
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            return _MISS
+
+        value, fetched_at = entry
+        age = time.monotonic() - fetched_at
+        if age < self.ttl:
+            return value
+        if age < self.ttl + self.stale_ttl:
+            self._refresh_in_background(key)
+            return value
+        return _MISS
+
+    def peek(self, key):
+        """期限に関係なく手元の値を返す（なければ None）。取得はしない。"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            if self.max_entries is not None:
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _load(self, key):
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+
+        if not leader:
+            # 先行リクエストの結果を待つ
+            if not call.done.wait(self.wait_timeout):
+                raise TimeoutError(f"timed out waiting for in-flight fetch of {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = self._fetch(key)
+            self.set(key, call.value)
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+
+    def _refresh_in_background(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._load(key)
+            except Exception:
+                # 失敗しても古い値を出し続ける
+                logger.warning("background refresh failed for %r", key, exc_info=True)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"swr-refresh-{key}", daemon=True).start()
@@ -0,0 +1,26 @@
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from . import timing
+
+
+# ========= 描画時間を計る Django テンプレートバックエンド =========
+# 動作は DjangoTemplates と同じ。render() の時間を Server-Timing の tpl に足す。
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        with timing.template_render():
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
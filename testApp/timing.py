@@ -0,0 +1,75 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+
+# ========= リクエスト内の処理時間の内訳 =========
+# RequestTimingMiddleware がリクエストごとに RequestTiming を作って contextvar に置き、
+# DB（execute_wrapper）・テンプレート（template_backend）・外部 API（http_client）が
+# それぞれここに時間を足していく。
+# 別スレッドで動く処理（batch の並行呼び出しやプレビューの先読み）は数えない。
+
+class RequestTiming:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_count = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.http_count = 0
+        self.http_seconds = 0.0
+        self._template_depth = 0
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        """Server-Timing ヘッダの値（ミリ秒）。"""
+        parts = [
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_count} queries"',
+            f"tpl;dur={self.template_seconds * 1000:.1f}",
+            f'http;dur={self.http_seconds * 1000:.1f};desc="{self.http_count} calls"',
+            f"total;dur={total * 1000:.1f}",
+        ]
+        return ", ".join(parts)
+
+
+_current = contextvars.ContextVar("request_timing", default=None)
+
+
+def start():
+    timing = RequestTiming()
+    return timing, _current.set(timing)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def record_http(seconds):
+    timing = _current.get()
+    if timing is not None:
+        timing.http_count += 1
+        timing.http_seconds += seconds
+
+
+@contextmanager
+def template_render():
+    """テンプレート描画を計る。入れ子の描画は外側の分だけ数える。"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    timing._template_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing._template_depth -= 1
+        if timing._template_depth == 0:
+            timing.template_seconds += time.perf_counter() - started
@@ -0,0 +1,195 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import http_client
+from .models import TodoistSyncState, TodoistTask
+
+
+# ========= Todoist: ローカルミラーと増分同期 =========
+# タスク一覧はミラーテーブル（TodoistTask）から返し、Todoist とは
+# Sync API の sync_token を使った増分同期で差分だけやり取りする。
+# 作成・完了はビュー側で REST API を呼んだ後、ここでミラーにも書き込む。
+
+SYNC_PATH = "sync/v9/sync"
+
+
+def sync_request_data(state):
+    return {"sync_token": state.sync_token, "resource_types": json.dumps(["items"])}
+
+
+def is_stale(state):
+    if state.synced_at is None:
+        return True
+    return timezone.now() - state.synced_at > timedelta(seconds=settings.TODOIST_SYNC_INTERVAL)
+
+
+@transaction.atomic
+def apply_sync(data):
+    """Sync API のレスポンスをミラーに反映する。"""
+    items = data.get("items") or []
+    if data.get("full_sync"):
+        # 全件同期：レスポンスに無いものは消えたタスク
+        TodoistTask.objects.exclude(id__in=[str(i["id"]) for i in items]).delete()
+
+    removed = [str(i["id"]) for i in items if i.get("is_deleted")]
+    live = [
+        TodoistTask(
+            id=str(i["id"]),
+            content=i.get("content") or "",
+            is_completed=bool(i.get("checked")),
+            order=i.get("child_order") or 0,
+        )
+        for i in items
+        if not i.get("is_deleted")
+    ]
+    if removed:
+        TodoistTask.objects.filter(id__in=removed).delete()
+    if live:
+        TodoistTask.objects.bulk_create(
+            live,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=["content", "is_completed", "order", "synced_at"],
+        )
+
+    TodoistSyncState.load()
+    changed = bool(items) or bool(data.get("full_sync"))
+    TodoistSyncState.objects.filter(pk=1).update(
+        sync_token=data.get("sync_token", "*"),
+        synced_at=timezone.now(),
+        version=F("version") + int(changed),
+    )
+
+
+def sync(force=False):
+    """ミラーが古ければ（force なら必ず）増分同期する。同期したら True。"""
+    state = TodoistSyncState.load()
+    if not force and not is_stale(state):
+        return False
+
+    r = http_client.post("todoist", SYNC_PATH, data=sync_request_data(state), retry=True)
+    r.raise_for_status()
+    apply_sync(r.json())
+    return True
+
+
+def open_tasks():
+    return list(
+        TodoistTask.objects.filter(is_completed=False)
+        .order_by("order", "id")
+        .values("id", "content")
+    )
+
+
+def has_synced():
+    return TodoistSyncState.objects.filter(synced_at__isnull=False).exists()
+
+
+def tasks_version():
+    """ミラーの版。中身が変わらなければ同じ値（version 列を 1 つ読むだけ）。"""
+    version = TodoistSyncState.objects.filter(pk=1).values_list("version", flat=True).first()
+    return version or 0
+
+
+def _bump_version():
+    TodoistSyncState.load()
+    TodoistSyncState.objects.filter(pk=1).update(version=F("version") + 1)
+
+
+def record_created(task):
+    """REST API で作成したタスクをミラーに書き込む。"""
+    TodoistTask.objects.update_or_create(
+        id=str(task.get("id")),
+        defaults={
+            "content": task.get("content") or "",
+            "is_completed": False,
+            "order": task.get("order") or 0,
+        },
+    )
+    _bump_version()
+
+
+def record_closed(task_id):
+    if TodoistTask.objects.filter(id=str(task_id)).update(
+        is_completed=True, synced_at=timezone.now()
+    ):
+        _bump_version()
+
+
+def record_reopened(task_id):
+    if TodoistTask.objects.filter(id=str(task_id)).update(
+        is_completed=False, synced_at=timezone.now()
+    ):
+        _bump_version()
+
+
+# ========= Todoist: まとめて操作（batch） =========
+# 各操作は並行して Todoist に送り（上限 TODOIST_BATCH_WORKERS 本）、
+# 結果は入力と同じ順で返す。ミラーへの書き込みは全部終わってから呼び出し元スレッドで行う。
+
+def plan_op(op):
+    """1 件分の操作を (method, path, kwargs) にする。不正なら ValueError。"""
+    kind = op.get("op") if isinstance(op, dict) else None
+    if kind == "create":
+        content = str(op.get("content") or "").strip()
+        if not content:
+            raise ValueError("content is required")
+        return "POST", "rest/v2/tasks", {"json": {"content": content}}
+    if kind in ("close", "reopen"):
+        task_id = op.get("taskId")
+        if not task_id:
+            raise ValueError("taskId is required")
+        # close / reopen は冪等なのでリトライしてよい
+        return "POST", f"rest/v2/tasks/{quote(str(task_id), safe='')}/{kind}", {"retry": True}
+    raise ValueError(f"unknown op: {kind!r}")
+
+
+def op_result(op, response):
+    """上流のレスポンス（requests / httpx）を 1 件分の結果にする。"""
+    if op["op"] == "create":
+        if response.status_code not in (200, 201):
+            return {"ok": False, "error": "Todoist create failed", "status": response.status_code}
+        task = response.json()
+        return {"ok": True, "id": task.get("id"), "content": task.get("content")}
+
+    if response.status_code not in (200, 204):
+        return {"ok": False, "error": f"Todoist {op['op']} failed", "status": response.status_code}
+    return {"ok": True, "taskId": op["taskId"]}
+
+
+def record_results(ops, results):
+    for op, result in zip(ops, results):
+        if not result.get("ok"):
+            continue
+        if op["op"] == "create":
+            record_created(result)
+        elif op["op"] == "close":
+            record_closed(op["taskId"])
+        else:
+            record_reopened(op["taskId"])
+
+
+def _run_op(op):
+    try:
+        method, path, kwargs = plan_op(op)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    try:
+        return op_result(op, http_client.request("todoist", method, path, **kwargs))
+    except Exception as e:
+        return {"ok": False, "error": "Todoist exception", "detail": str(e)}
+
+
+def run_batch(ops):
+    workers = max(1, min(settings.TODOIST_BATCH_WORKERS, len(ops)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_run_op, ops))
+    record_results(ops, results)
+    return results
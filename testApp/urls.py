@@ -1,9 +1,16 @@
 # devProject2/devProject/testApp/urls.py
 
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 from django.contrib.auth.views import LogoutView
 
+# ASGI で動かすときは外部 API ビューを async 版に差し替える
+if settings.ASYNC_API_VIEWS:
+    from . import async_views as api_views
+else:
+    api_views = views
+
 urlpatterns = [
     # ホーム（タイムライン）
     path("", views.timeline, name="timeline"),
@@ -15,6 +22,12 @@ urlpatterns = [
     path("post/<int:pk>/delete/", views.post_delete, name="post_delete"),
     path("post/<int:pk>/like/", views.like_post, name="like_post"),
 
+    # タイムラインのライブ更新（SSE, ASGI のみ）
+    path("events/timeline/", async_views.timeline_events, name="timeline_events"),
+
+    # 投稿 API（JSON / NDJSON）
+    path("api/posts/", views.api_posts, name="api_posts"),
+
     # 認証
     path("signup/", views.SignUpView.as_view(), name="signup"),
     path("login/", views.LoginViewCustom.as_view(), name="login"),
@@ -22,14 +35,24 @@ urlpatterns = [
 
     # ポモドーロ
     path("pomodoro/", views.pomodoro, name="pomodoro"),
+    path("pomodoro/stats/", views.pomodoro_stats, name="pomodoro_stats"),
+    path("api/pomodoro/sessions/", views.api_pomodoro_sessions, name="api_pomodoro_sessions"),
 
     # Freesound
-    path("api/sound/", views.api_sound, name="api_sound"),
+    path("api/sound/", api_views.api_sound, name="api_sound"),
+    path("api/sound/<int:sound_id>/stream/", views.api_sound_stream, name="api_sound_stream"),
 
     # Todoist
-    path("api/todoist/tasks/", views.api_todoist_tasks, name="api_todoist_tasks"),
-    path("api/todoist/task/create/", views.api_todoist_create_task, name="api_todoist_create_task"),
-    path("api/todoist/task/close/", views.api_todoist_close_task, name="api_todoist_close_task"),
+    path("api/todoist/tasks/", api_views.api_todoist_tasks, name="api_todoist_tasks"),
+    path("api/todoist/task/create/", api_views.api_todoist_create_task, name="api_todoist_create_task"),
+    path("api/todoist/task/close/", api_views.api_todoist_close_task, name="api_todoist_close_task"),
+    path("api/todoist/batch/", api_views.api_todoist_batch, name="api_todoist_batch"),
+
+    # キャッシュ統計（スタッフのみ）
+    path("api/cache/stats/", views.api_cache_stats, name="api_cache_stats"),
+
+    # メトリクス（Prometheus）
+    path("metrics", views.metrics_view, name="metrics"),
 
     # UTC 時刻
     path("api/time/utc/", views.api_time_utc, name="api_time_utc"),
@@ -1,38 +1,131 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from .models import Post
 from .forms import PostForm
-
+from .fragments import fragment_cache_stats, invalidate_post_card, render_post_cards
+from . import http_client, live, metrics, page_cache, pomodoro_log, post_api, todoist
+from .eventlog import log_event
+from .file_response import ranged_file_response
+from .freesound import (
+    FreesoundError,
+    cached_preview,
+    download_preview,
+    normalize_tag,
+    prefetch_preview,
+    preview_url_for,
+    remember_preview_url,
+    sound_search_cache,
+)
+from .page_cache import cache_anonymous_page
+from .pagination import paginate_keyset
+from .search import count_results, search_posts
+from .streaming import streaming_response
+
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views.generic import CreateView
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.views import LoginView, LogoutView
 
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST, require_GET
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import condition, require_POST, require_GET, require_safe
+from django.views.decorators.cache import cache_control
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.utils.cache import get_conditional_response, quote_etag
 from django.views.decorators.csrf import csrf_exempt
 
 from datetime import datetime, timezone  # ✅ 用于 UTC 时间
 
+from urllib.parse import urlencode
+
 import requests
-import os
+import hashlib
 import json
+import logging
 import random
 
 
 # ========= タイムライン / 投稿 =========
+TIMELINE_PAGE_SIZE = 20
+
+
+def _page_number(request):
+    try:
+        return max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        return 1
+
+
+def _page_etag(request, *args, **kwargs):
+    """
+    タイムライン・投稿詳細の ETag。投稿の最終変更の世代（page_cache）と閲覧者から作るので、
+    匿名なら DB を読まずに 304 を返せる。フラッシュメッセージがあるときは付けない。
+    世代番号が全ワーカーで共有されていない（SHARED_CACHE でない）ときも付けない。
+    """
+    if not settings.SHARED_CACHE or CookieStorage.cookie_name in request.COOKIES:
+        return None
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return f"{page_cache.generation()}-anon"
+    # ページ内のフォーム（ログアウト）と JS が CSRF トークンを使うので、ログインし直して
+    # セッションや CSRF の秘密が変わったら別の ETag にする（古いトークンのページを 304 で使わせない）
+    secret = hashlib.md5(
+        f"{request.COOKIES[settings.SESSION_COOKIE_NAME]}|"
+        f"{request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')}".encode(),
+        usedforsecurity=False,
+    ).hexdigest()[:16]
+    return f"{page_cache.generation()}-{request.user.pk or 'anon'}-{secret}"
+
+
+def _page_last_modified(request, *args, **kwargs):
+    # ログイン・ログアウトでも表示が変わるので、Last-Modified は匿名のときだけ
+    if not settings.SHARED_CACHE or settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return None
+    return page_cache.last_change()
+
+
+def conditional_page(view):
+    """条件付き GET（304）。ブラウザには毎回 ETag で再検証させる。"""
+    view = condition(etag_func=_page_etag, last_modified_func=_page_last_modified)(view)
+    return cache_control(no_cache=True)(view)
+
+
+@conditional_page
+@cache_anonymous_page(params=("q", "cursor", "page"))
 def timeline(request):
-    q = request.GET.get("q")
-    posts = Post.objects.all().order_by("-created_at")
+    q = (request.GET.get("q") or "").strip()
+    next_query = None
+    context = {"q": q}
+
     if q:
-        posts = posts.filter(content__icontains=q)
+        # 検索：全文検索インデックスのランキング順にページング
+        page = _page_number(request)
+        ids, has_next = search_posts(q, page, TIMELINE_PAGE_SIZE)
+        by_id = Post.objects.for_cards().with_viewer_liked(request.user).in_bulk(ids)
+        posts = [by_id[i] for i in ids if i in by_id]
+        if has_next:
+            next_query = urlencode({"q": q, "page": page + 1})
+
+        result_count, capped = count_results(q)
+        context.update(
+            is_first_page=page == 1, result_count=result_count, result_count_capped=capped
+        )
+    else:
+        cursor = request.GET.get("cursor")
+        posts, next_cursor = paginate_keyset(
+            Post.objects.for_cards().with_viewer_liked(request.user), cursor, TIMELINE_PAGE_SIZE
+        )
+        if next_cursor:
+            next_query = urlencode({"cursor": next_cursor})
+        context["is_first_page"] = not cursor
 
-    context = {"posts": posts, "q": q}
+    context.update(posts=posts, cards=render_post_cards(posts), next_query=next_query)
     return render(request, "timeline.html", context)
 
 
+@conditional_page
 def post_detail(request, pk):
-    post = get_object_or_404(Post, pk=pk)
+    post = get_object_or_404(Post.objects.for_cards(), pk=pk)
     return render(request, "post_detail.html", {"post": post})
 
 
@@ -44,6 +137,7 @@ def post_create(request):
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            live.publish_post(post)
             return redirect("timeline")
     else:
         form = PostForm()
@@ -53,13 +147,14 @@ def post_create(request):
 def post_edit(request, pk):
     post = get_object_or_404(Post, pk=pk)
 
-    if request.user != post.author:
+    if post.author_id != request.user.id:
         return redirect("post_detail", pk=pk)
 
     if request.method == "POST":
         form = PostForm(request.POST, instance=post)
         if form.is_valid():
-            form.save()
+            # 編集した列だけ書く（読み込み後に付いたいいねの件数を上書きしない）
+            form.save(commit=False).save(update_fields=["content"])
             return redirect("post_detail", pk=pk)
     else:
         form = PostForm(instance=post)
@@ -70,34 +165,37 @@ def post_edit(request, pk):
 def post_delete(request, pk):
     post = get_object_or_404(Post, pk=pk)
 
-    if request.user != post.author:
+    if post.author_id != request.user.id:
         return redirect("post_detail", pk=pk)
 
     if request.method == "POST":
+        invalidate_post_card(post)
         post.delete()
         return redirect("timeline")
 
     return render(request, "post_delete.html", {"post": post})
 
 
+@require_POST
+@login_required
 def like_post(request, pk):
-    post = get_object_or_404(Post, pk=pk)
-    user = request.user
+    post = get_object_or_404(Post.objects.only("id"), pk=pk)
+    liked, count = Post.objects.toggle_like(post.pk, request.user.id)
+    live.publish_like(post.pk, count)
+    return JsonResponse({"liked": liked, "count": count})
 
-    if post.likes.filter(id=user.id).exists():
-        post.likes.remove(user)
-        liked = False
-    else:
-        post.likes.add(user)
-        liked = True
 
-    return JsonResponse({"liked": liked, "count": post.total_likes()})
+# ========= ポモドーロ =========
+def _minutes(request, name, default):
+    try:
+        return min(max(int(request.GET.get(name, default)), 1), pomodoro_log.MAX_MINUTES)
+    except ValueError:
+        return default
 
 
-# ========= ポモドーロ =========
 def pomodoro(request):
-    work_minutes = int(request.GET.get("work", 25))
-    break_minutes = int(request.GET.get("rest", 5))
+    work_minutes = _minutes(request, "work", 25)
+    break_minutes = _minutes(request, "rest", 5)
 
     context = {
         "work_minutes": work_minutes,
@@ -106,6 +204,55 @@ def pomodoro(request):
     return render(request, "pomodoro.html", context)
 
 
+@login_required
+@require_POST
+def api_pomodoro_sessions(request):
+    """
+    完了した作業・休憩の区間をまとめて記録する。
+
+    body: {"sessions": [{"kind": "work" | "break", "startedAt": ISO 8601,
+                         "endedAt": ISO 8601, "seconds": 実際に数えた秒数}, ...]}
+
+    不正な区間・記録済みの区間と重なる区間は rejected（位置と理由）で返し、残りは記録する。
+    """
+    body = _json_body(request)
+    if body is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    try:
+        sessions, rejected = pomodoro_log.parse_sessions(body.get("sessions"), request.user)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    recorded, overlapping = pomodoro_log.record_sessions(request.user, list(sessions.values()))
+    rejected += [
+        {"index": index, "error": "overlaps another recorded session"}
+        for index, session in sessions.items()
+        if any(session is o for o in overlapping)
+    ]
+    return JsonResponse(
+        {
+            "recorded": recorded,
+            "skipped": len(sessions) - recorded - len(overlapping),
+            "rejected": sorted(rejected, key=lambda r: r["index"]),
+        }
+    )
+
+
+@login_required
+def pomodoro_stats(request):
+    """日別の集中時間。集計行（PomodoroDailyStat）だけを読む。"""
+    days = 30 if request.GET.get("range") == "30" else 7
+    stats = pomodoro_log.daily_stats(request.user, days)
+    context = {
+        "days": days,
+        "stats": stats,
+        "total_minutes": sum(s.work_seconds for s in stats) // 60,
+        "total_sessions": sum(s.work_sessions for s in stats),
+        "max_seconds": max([s.work_seconds for s in stats] + [1]),
+    }
+    return render(request, "pomodoro_stats.html", context)
+
+
 # ========= 認証 =========
 class SignUpView(CreateView):
     form_class = UserCreationForm
@@ -127,155 +274,190 @@ def api_sound(request):
     """
     Freesound からタグ(tag)に応じた環境音を1つランダム取得して返す API。
 
-    ここを詳しくデバッグできるように、print とエラー情報をかなり出すようにしている。
+    検索結果はタグごとにプロセス内でキャッシュし（stale-while-revalidate）、
+    その中から random.choice するので、通常は Freesound へ問い合わせない。
     """
-    tag = (request.GET.get("tag") or "rain").strip()  # 例: "rain", "birds"
+    tag = normalize_tag(request.GET.get("tag"))  # 例: "rain", "birds"
 
-    token = os.environ.get("FREESOUND_TOKEN")
-    if not token:
+    if not http_client.has_token("freesound"):
         return JsonResponse({"error": "FREESOUND_TOKEN is not set"}, status=500)
 
-    url = "https://freesound.org/apiv2/search/text/"
-
-    # ✅ Freesound は query パラメータ token= でも、Authorization: Token xxxx でもOK
-    # 念のため両方つけておく
-    params = {
-        "query": tag,
-        "page_size": 20,
-        "fields": "id,name,previews",
-        "token": token,
-    }
-    headers = {"Authorization": f"Token {token}"}
-
     try:
-        print("[api_sound] ===============================")
-        print("[api_sound] tag =", tag)
-        print("[api_sound] url =", url)
-
-        r = requests.get(url, params=params, headers=headers, timeout=10)
-
-        print("[api_sound] status =", r.status_code)
-        print("[api_sound] content-type =", r.headers.get("Content-Type"))
-        # レスポンスの先頭だけログに出す（全部は長すぎるので）
-        print("[api_sound] body_preview =", r.text[:400])
-
-        # ステータスコードが 200 以外なら例外にして except でまとめて処理
-        r.raise_for_status()
-
-        # JSON パース
-        try:
-            data = r.json()
-        except Exception as e:
-            print("[api_sound] JSON decode error:", e)
-            return JsonResponse(
-                {
-                    "error": "Freesound JSON parse error",
-                    "detail": str(e),
-                    "raw": r.text[:200],
-                },
-                status=502,
-            )
-
-        results = data.get("results") or []
-        if not results:
-            print("[api_sound] no results for tag =", tag)
-            return JsonResponse({"error": f"No sound found for tag={tag}"}, status=404)
-
-        chosen = random.choice(results)
-        previews = chosen.get("previews") or {}
-        mp3 = previews.get("preview-hq-mp3") or previews.get("preview-lq-mp3")
-
-        if not mp3:
-            print("[api_sound] no mp3 preview in chosen result:", chosen)
-            return JsonResponse({"error": "No mp3 preview found"}, status=502)
-
-        print("[api_sound] chosen id =", chosen.get("id"))
-        print("[api_sound] chosen name =", chosen.get("name"))
-        print("[api_sound] chosen mp3 =", mp3)
-
-        return JsonResponse(
-            {
-                "id": chosen.get("id"),
-                "name": chosen.get("name"),
-                "mp3Url": mp3,
-                "tag": tag,
-            }
-        )
-
+        results = sound_search_cache.get(tag)
+    except FreesoundError as e:
+        return JsonResponse(e.payload, status=502)
     except requests.exceptions.RequestException as e:
         # ネットワーク系エラー（タイムアウトなど）
-        print("[api_sound] RequestException:", repr(e))
+        log_event("api_sound_failed", level=logging.WARNING, tag=tag, error=repr(e))
         return JsonResponse(
             {"error": "Freesound request exception", "detail": str(e)},
             status=502,
         )
     except Exception as e:
         # それ以外のエラー
-        print("[api_sound] Other exception:", repr(e))
+        log_event("api_sound_failed", level=logging.ERROR, tag=tag, error=repr(e))
         return JsonResponse(
             {"error": "Freesound exception", "detail": str(e)},
             status=502,
         )
 
+    return _sound_choice_response(tag, results)
+
+
+def _sound_choice_response(tag, results):
+    """検索結果から 1 つ選んで返す（async 版の api_sound と共通）。"""
+    if not results:
+        return JsonResponse({"error": f"No sound found for tag={tag}"}, status=404)
+
+    chosen = random.choice(results)
+    previews = chosen.get("previews") or {}
+    mp3 = previews.get("preview-hq-mp3") or previews.get("preview-lq-mp3")
+
+    if not mp3:
+        log_event("api_sound_no_preview", level=logging.WARNING, tag=tag, sound_id=chosen.get("id"))
+        return JsonResponse({"error": "No mp3 preview found"}, status=502)
+
+    # ローカルにキャッシュ済みならそちらを返す。未取得なら裏で取りに行く
+    sound_id = chosen.get("id")
+    if sound_id is not None:
+        remember_preview_url(sound_id, mp3)
+        if cached_preview(sound_id):
+            mp3 = reverse("api_sound_stream", args=[sound_id])
+        else:
+            prefetch_preview(sound_id, mp3)
+
+    return JsonResponse(
+        {
+            "id": sound_id,
+            "name": chosen.get("name"),
+            "mp3Url": mp3,
+            "tag": tag,
+        }
+    )
+
+
+@require_safe
+def api_sound_stream(request, sound_id):
+    """キャッシュしたプレビュー MP3 を配信する（Range / 条件付きリクエスト対応）。"""
+    path = cached_preview(sound_id)
+    if path is not None:
+        response = _preview_response(request, sound_id, path)
+        if response is not None:
+            return response
+        # 見つけてから開くまでの間に evict_previews で消された → キャッシュミスとして取り直す
+
+    url = preview_url_for(sound_id)
+    if not url:
+        # api_sound が返していない ID。Freesound には問い合わせない
+        return JsonResponse({"error": f"No preview for sound {sound_id}"}, status=404)
+    try:
+        path = download_preview(sound_id, url)
+    except requests.exceptions.RequestException as e:
+        return JsonResponse(
+            {"error": "Freesound request exception", "detail": str(e)},
+            status=502,
+        )
+
+    response = _preview_response(request, sound_id, path)
+    if response is None:
+        return JsonResponse({"error": f"Preview for sound {sound_id} was evicted"}, status=503)
+    return response
+
+
+def _preview_response(request, sound_id, path):
+    """プレビューのファイルを返す。ファイルが消えていれば None。"""
+    try:
+        # プレビューは ID ごとに不変なので、ID とサイズで十分
+        etag = f'"{sound_id}-{path.stat().st_size}"'
+        return ranged_file_response(request, path, "audio/mpeg", etag)
+    except FileNotFoundError:
+        return None
+
 
 # ========= Todoist helper =========
-def _todoist_headers():
-    token = os.environ.get("TODOIST_TOKEN")
-    if not token:
+def _json_body(request):
+    """JSON ボディを dict で返す。壊れていれば None。"""
+    try:
+        body = json.loads(request.body.decode("utf-8") or "{}")
+    except Exception:
         return None
-    return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    return body if isinstance(body, dict) else None
+
+
+def _todoist_failed(what, r):
+    return JsonResponse(
+        {"error": f"Todoist {what} failed", "status": r.status_code, "body": r.text},
+        status=502,
+    )
+
+
+def _todoist_tasks_response(request, stale):
+    """
+    ミラーの版から ETag を作り、If-None-Match と一致すれば 304（タスク一覧は読まない）。
+    async 版からも sync_to_async で使う。
+    """
+    etag = quote_etag(f"tasks-{todoist.tasks_version()}{'-stale' if stale else ''}")
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        payload = {"tasks": todoist.open_tasks()}
+        if stale:
+            payload["stale"] = True
+        response = JsonResponse(payload)
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
 
 
 # ========= Todoist: タスクリスト取得 =========
 @require_GET
 def api_todoist_tasks(request):
-    headers = _todoist_headers()
-    if not headers:
+    """
+    ローカルミラーから未完了タスクを返す。
+
+    ミラーが TODOIST_SYNC_INTERVAL より古いとき、または ?refresh=1（「更新」ボタン）の
+    ときだけ Todoist と増分同期する。同期に失敗しても、一度でも同期済みなら
+    手元のミラーを stale: true 付きで返す。
+    """
+    if not http_client.has_token("todoist"):
         return JsonResponse({"error": "TODOIST_TOKEN is not set"}, status=500)
 
-    url = "https://api.todoist.com/rest/v2/tasks"
+    stale = False
     try:
-        r = requests.get(url, headers=headers, timeout=15)
-        if r.status_code != 200:
-            return JsonResponse(
-                {"error": "Todoist list failed", "status": r.status_code, "body": r.text},
-                status=502,
-            )
-
-        tasks = r.json()
-        simple = [{"id": t.get("id"), "content": t.get("content")} for t in tasks]
-        return JsonResponse({"tasks": simple})
+        todoist.sync(force=request.GET.get("refresh") == "1")
+    except requests.exceptions.HTTPError as e:
+        if not todoist.has_synced():
+            return _todoist_failed("sync", e.response)
+        stale = True
     except Exception as e:
-        return JsonResponse({"error": "Todoist exception", "detail": str(e)}, status=502)
+        if not todoist.has_synced():
+            return JsonResponse({"error": "Todoist exception", "detail": str(e)}, status=502)
+        stale = True
+
+    return _todoist_tasks_response(request, stale)
 
 
 # ========= Todoist: タスク作成 =========
 @csrf_exempt
 @require_POST
 def api_todoist_create_task(request):
-    headers = _todoist_headers()
-    if not headers:
+    if not http_client.has_token("todoist"):
         return JsonResponse({"error": "TODOIST_TOKEN is not set"}, status=500)
 
-    try:
-        body = json.loads(request.body.decode("utf-8") or "{}")
-        content = (body.get("content") or "").strip()
-    except Exception:
+    body = _json_body(request)
+    if body is None:
         return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    content = str(body.get("content") or "").strip()
 
     if not content:
         return JsonResponse({"error": "content is required"}, status=400)
 
-    url = "https://api.todoist.com/rest/v2/tasks"
     try:
-        r = requests.post(url, headers=headers, json={"content": content}, timeout=15)
+        r = http_client.post("todoist", "rest/v2/tasks", json={"content": content})
         if r.status_code not in (200, 201):
-            return JsonResponse(
-                {"error": "Todoist create failed", "status": r.status_code, "body": r.text},
-                status=502,
-            )
+            return _todoist_failed("create", r)
 
         task = r.json()
+        todoist.record_created(task)
         return JsonResponse({"id": task.get("id"), "content": task.get("content")})
     except Exception as e:
         return JsonResponse({"error": "Todoist exception", "detail": str(e)}, status=502)
@@ -285,32 +467,104 @@ def api_todoist_create_task(request):
 @csrf_exempt
 @require_POST
 def api_todoist_close_task(request):
-    headers = _todoist_headers()
-    if not headers:
+    if not http_client.has_token("todoist"):
         return JsonResponse({"error": "TODOIST_TOKEN is not set"}, status=500)
 
-    try:
-        body = json.loads(request.body.decode("utf-8") or "{}")
-        task_id = body.get("taskId")
-    except Exception:
+    body = _json_body(request)
+    if body is None:
         return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    task_id = body.get("taskId")
 
     if not task_id:
         return JsonResponse({"error": "taskId is required"}, status=400)
 
-    url = f"https://api.todoist.com/rest/v2/tasks/{task_id}/close"
     try:
-        r = requests.post(url, headers=headers, timeout=15)
+        # 完了は何度送っても同じ結果になるのでリトライしてよい
+        r = http_client.post("todoist", f"rest/v2/tasks/{task_id}/close", retry=True)
         if r.status_code not in (204, 200):
-            return JsonResponse(
-                {"error": "Todoist close failed", "status": r.status_code, "body": r.text},
-                status=502,
-            )
+            return _todoist_failed("close", r)
+        todoist.record_closed(task_id)
         return JsonResponse({"ok": True})
     except Exception as e:
         return JsonResponse({"error": "Todoist exception", "detail": str(e)}, status=502)
 
 
+# ========= Todoist: まとめて操作 =========
+@csrf_exempt
+@require_POST
+def api_todoist_batch(request):
+    """
+    {"ops": [{"op": "create", "content": ...}, {"op": "close", "taskId": ...}, ...]}
+    を受け取り、並行して Todoist に送る。結果は ops と同じ順で返す。
+    """
+    if not http_client.has_token("todoist"):
+        return JsonResponse({"error": "TODOIST_TOKEN is not set"}, status=500)
+
+    ops, error = _batch_ops(request)
+    if error:
+        return JsonResponse({"error": error}, status=400)
+
+    return JsonResponse({"results": todoist.run_batch(ops)})
+
+
+def _batch_ops(request):
+    body = _json_body(request)
+    if body is None:
+        return None, "Invalid JSON body"
+    ops = body.get("ops")
+    if not isinstance(ops, list) or not ops:
+        return None, "ops is required"
+    if len(ops) > settings.TODOIST_BATCH_MAX_OPS:
+        return None, f"too many ops (max {settings.TODOIST_BATCH_MAX_OPS})"
+    return ops, None
+
+
+# ========= キャッシュ統計 =========
+@staff_member_required
+@require_GET
+def api_cache_stats(request):
+    return JsonResponse({"postCards": fragment_cache_stats()})
+
+
+# ========= メトリクス（Prometheus） =========
+@require_GET
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# ========= 投稿 API =========
+@require_GET
+def api_posts(request):
+    """
+    投稿を新しい順に JSON で返す。
+
+    - cursor / limit: カーソルページング（next_cursor を次の cursor に渡す）
+    - fields: 返すフィールド（カンマ区切り）
+    - since / since_id: それより新しい投稿だけ（差分取得）
+    - format=ndjson: ページングせず全件を 1 行 1 投稿で流す
+    """
+    try:
+        rows, fields = post_api.post_rows(request.GET)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    cursor = request.GET.get("cursor")
+    if request.GET.get("format") == "ndjson":
+        return streaming_response(
+            request,
+            post_api.ndjson_lines(rows, fields, cursor),
+            content_type="application/x-ndjson; charset=utf-8",
+        )
+
+    posts, next_cursor = post_api.page(
+        rows, fields, cursor, post_api.parse_limit(request.GET.get("limit"))
+    )
+    return JsonResponse({"posts": posts, "next_cursor": next_cursor})
+
+
 # ========= UTC Time (no external API) =========
 @require_GET
 def api_time_utc(request):